@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks the prediction speed of the models on the bundled datasets.
+
+Every (dataset, model) pair runs in a fresh process on the first `--limit` documents of the
+dataset in file name order, one document per call. In "cold" mode the timed pass starts right
+after the model is built, so it includes loading the NLP pipelines and filling the caches. In
+"warm" mode the same documents are analysed once before the timed pass, which loads the
+pipelines the model uses and fills its caches. Results are written as sorted, indented JSON, so
+the files of two commits can be diffed or passed to --compare.
+
+Usage: python benchmark.py --mode warm --limit 20 --output benchmark-warm.json [--compare old.json]
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import subprocess
+import multiprocessing
+from argparse import ArgumentParser, RawDescriptionHelpFormatter
+import numpy as np
+
+DATASETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datasets")
+DATASETS = ["books", "fiction", "news", "theses", "wiki"]
+MODELS = ["karas", "ac", "nath", "zlatkova"]
+
+
+def _max_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_analyser(model_name, zlatkova_model=None):
+    """Returns a function analysing one (text, truth) document with the model."""
+    from feature_extraction.computation import feature_extractors
+    if model_name in ["karas", "ac"]:
+        from models import KarasModel, ACModel
+        model = (KarasModel if model_name == "karas" else ACModel)([], list(feature_extractors.keys()))
+        return lambda text, truth: model.test([(text, truth)], False)[0]
+    if model_name == "nath":
+        from models import NathModel
+        model = NathModel([], [])
+        return lambda text, truth: model.test([(text, truth)])
+    if model_name == "zlatkova":
+        if zlatkova_model is None:
+            raise ValueError("zlatkova needs the path of a saved model, see --zlatkova-model")
+        from models import ZlatkovaModel
+        from models.zlatkova_et_al.load_model import load_model
+        model = ZlatkovaModel(zlatkova_model)
+        loaded = load_model(zlatkova_model)
+        return lambda text, truth: model._analyse(loaded, text)
+    raise ValueError("Unknown model {}".format(model_name))
+
+
+def run_benchmark(job):
+    """Benchmarks one model on one dataset, runs in its own process."""
+    dataset, model_name, mode, limit, zlatkova_model = job
+    result = {"dataset": dataset, "model": model_name, "mode": mode}
+    try:
+        from get_texts_from_path import iter_docs
+        from models.utils.text_segmentation import get_paragraphs_of
+        setup_start = time.perf_counter()
+        docs = list(iter_docs(os.path.join(DATASETS_DIR, dataset), limit=limit))
+        analyse = build_analyser(model_name, zlatkova_model)
+        if mode == "warm":
+            for _, text, truth in docs:
+                analyse(text, truth)
+        result["setup_seconds"] = time.perf_counter() - setup_start
+
+        latencies = []
+        for _, text, truth in docs:
+            start_time = time.perf_counter()
+            analyse(text, truth)
+            latencies.append(time.perf_counter() - start_time)
+    except Exception as e:
+        result["error"] = "{}: {}".format(type(e).__name__, e)
+        return result
+
+    total = sum(latencies)
+    paragraphs = sum(len(get_paragraphs_of(text)) for _, text, _ in docs)
+    result.update({
+        "documents": len(docs),
+        "paragraphs": paragraphs,
+        "seconds": total,
+        "documents_per_second": len(docs) / total if total else None,
+        "paragraphs_per_second": paragraphs / total if total else None,
+        "latency_p50": float(np.percentile(latencies, 50)) if latencies else None,
+        "latency_p95": float(np.percentile(latencies, 95)) if latencies else None,
+        "max_rss_mb": _max_rss_mb(),
+    })
+    return result
+
+
+def benchmark(datasets, models, mode="cold", limit=None, zlatkova_model=None):
+    # a fresh interpreter per job, so neither pipelines nor caches or memory carry over between jobs
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for dataset in datasets:
+        for model_name in models:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_benchmark, ((dataset, model_name, mode, limit, zlatkova_model),))
+            print(json.dumps(result, sort_keys=True))
+            results.append(result)
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "mode": mode,
+        "limit": limit,
+        "results": results,
+    }
+
+
+def compare(old, new):
+    """Prints the relative change of the speed and latency of the jobs that are in both reports."""
+    old_results = {(result["dataset"], result["model"]): result for result in old["results"]}
+    for result in new["results"]:
+        before = old_results.get((result["dataset"], result["model"]))
+        if before is None or "error" in before or "error" in result:
+            continue
+        changes = []
+        for key in ["documents_per_second", "latency_p50", "latency_p95", "max_rss_mb"]:
+            if before.get(key) and result.get(key) is not None:
+                changes.append("{} {:+.1%}".format(key, result[key] / before[key] - 1))
+        print("{} {}: {}".format(result["dataset"], result["model"], ", ".join(changes)))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__, formatter_class=RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", nargs="+", default=DATASETS, choices=DATASETS)
+    parser.add_argument("--models", nargs="+", default=MODELS, choices=MODELS)
+    parser.add_argument("--mode", default="cold", choices=["cold", "warm"])
+    parser.add_argument("--limit", type=int, default=None, help="documents per dataset, all by default")
+    parser.add_argument("--zlatkova-model", default=None, help="directory of a saved zlatkova model")
+    parser.add_argument("--output", default=None, help="file of the JSON results")
+    parser.add_argument("--compare", default=None, help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    models = args.models
+    if "zlatkova" in models and args.zlatkova_model is None:
+        print("skipping zlatkova, it needs --zlatkova-model", file=sys.stderr)
+        models = [model for model in models if model != "zlatkova"]
+    report = benchmark(args.datasets, models, args.mode, args.limit, args.zlatkova_model)
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf8") as f:
+            compare(json.load(f), report)
@@ -0,0 +1,82 @@
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime
+
+MANIFEST_FILE = "manifest.json"
+DOCS_DIR = "docs"
+# settings that change how fast a run goes, not what it produces
+VOLATILE_CONFIG_KEYS = ("execution", "annotation_store", "annotation_batch", "outputDir", "resultDir", "checkpoint",
+                        "profiling", "sweep")
+
+
+def config_hash(config):
+    relevant = {key: value for key, value in config.items() if key not in VOLATILE_CONFIG_KEYS}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode("utf8")).hexdigest()[:16]
+
+
+def _to_json(value):
+    # numpy scalars and arrays of predictions and vectors
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError("Object of type {} is not JSON serializable".format(type(value).__name__))
+
+
+def _write_json(path, data):
+    with open(path + ".tmp", "w", encoding="utf8") as f:
+        json.dump(data, f, ensure_ascii=False, default=_to_json)
+    os.replace(path + ".tmp", path)
+
+
+class Checkpoint(object):
+    """Per-document results of an evaluation run on one dataset, written as soon as they are produced.
+
+    Results are kept under <path>/<config hash>/<dataset>, one atomically written file per document
+    next to a manifest with the configuration. Without `resume` earlier results of the same
+    configuration are discarded, with it they are returned by `done` so the run can skip them.
+    """
+
+    def __init__(self, path, config, dataset, resume=False):
+        self.config_hash = config_hash(config)
+        self.path = os.path.join(path, self.config_hash, dataset)
+        self.docs_path = os.path.join(self.path, DOCS_DIR)
+        if not resume and os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        if not os.path.exists(self.docs_path):
+            os.makedirs(self.docs_path)
+        manifest_path = os.path.join(self.path, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf8") as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"config_hash": self.config_hash, "config": config, "dataset": dataset,
+                             "started": datetime.now().isoformat(), "finished": None}
+        self.manifest["finished"] = None
+        _write_json(manifest_path, self.manifest)
+
+    def _doc_path(self, name):
+        return os.path.join(self.docs_path, os.path.splitext(name)[0] + ".json")
+
+    def done(self):
+        """Returns the file names of the documents already checkpointed."""
+        done = set()
+        for doc_file in os.listdir(self.docs_path):
+            if not doc_file.endswith(".json"):
+                continue  # a write interrupted before its rename
+            with open(os.path.join(self.docs_path, doc_file), "r", encoding="utf8") as f:
+                done.add(json.load(f)["name"])
+        return done
+
+    def load(self, name):
+        """Returns the (prediction, vectors) checkpointed for a document."""
+        with open(self._doc_path(name), "r", encoding="utf8") as f:
+            doc = json.load(f)
+        return doc["prediction"], doc["vectors"]
+
+    def save(self, name, prediction, vectors=None):
+        _write_json(self._doc_path(name), {"name": name, "prediction": prediction, "vectors": vectors})
+
+    def finish(self):
+        self.manifest["finished"] = datetime.now().isoformat()
+        _write_json(os.path.join(self.path, MANIFEST_FILE), self.manifest)
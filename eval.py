@@ -2,14 +2,26 @@
 import sys
 import os
 import json
+import csv
+from argparse import ArgumentParser
+from itertools import product
+from collections import deque
+from functools import lru_cache
 from sklearn.feature_selection import VarianceThreshold
 from sklearn.decomposition import PCA
 
-from get_texts_from_path import get_docs, get_vecs
+from get_texts_from_path import get_docs, iter_docs
 from models.utils import evaluation17
 from models import ACModel, NathModel,  ZlatkovaModel, KarasModel
 from feature_extraction.computation import feature_extractors
-from save_predictions import save_predictions, save_vectors
+from feature_extraction.annotation import set_annotation_store
+from feature_extraction.annotation_store import AnnotationStore
+from save_predictions import predictions_dir, save_prediction, vectors_dir
+from vector_store import VectorStore, VectorStoreWriter, is_vector_store
+from checkpoint import Checkpoint
+from profiling import profiler
+from models.utils.executor import map_documents
+from nlp_pipelines import registry
 
 """Configuration example:
 ```
@@ -33,12 +45,45 @@ from save_predictions import save_predictions, save_vectors
     "dev": "",  # path to development dataset
     "test": []  # paths to test datasets
   },
+  "annotation_store": {  # optional, reuses stanza annotations of already seen paragraphs between runs
+    "path": "",  # directory of the store
+    "max_size_mb": 1024  # least recently used annotations are evicted above this size
+  },
+  "annotation_batch": {  # optional, annotates paragraphs of several documents in shared stanza calls
+    "batch_size": 64,  # max paragraphs per stanza call
+    "max_chars": 20000  # max characters per stanza call
+  },
+  "execution": {  # optional, document-level parallelism of "ac" and "karas"
+    "workers": 1,  # number of worker processes, 1 runs in the main process
+    "chunk_size": 8  # documents sent to a worker at a time
+  },
+  "sweep": {  # optional, evaluates every combination of hyperparams of "ac" or "karas" on saved vectors
+    "grid": [[0.2, 0.3], [0.5, 1]],  # candidate values of each hyperparam, replaces model.hyperparams
+    "workers": 1  # grid points evaluated in parallel, 1 runs in the main process
+  },
+  "checkpoint": {  # optional, "ac" and "karas" save every document's results as soon as they are done
+    "path": ""  # directory of the checkpoints, eval.py --resume skips the documents done by the same config
+  },
+  "profiling": {  # optional, times the load, nlp, feature group, clustering/wilcoxon, evaluation and saving stages
+    "path": "",  # directory of the profile.json and profile.csv reports
+    "cprofile_top": 0  # keeps the cProfile stats of this many of the slowest documents in path/cprofile
+  },
+  "shard": {  # optional, evaluates a part of each test dataset
+    "shard_id": 0,  # files are split into num_shards interleaved shards
+    "num_shards": 1,
+    "offset": 0,  # first file of the shard to use
+    "limit": null  # number of files of the shard to use, null for all
+  },
   "outputDir": "", # path to save predictions,
   "resultDir": "" # path to save metrics,
   "vectorsDir": "" # if use_vectors is False its a path to save a folder with computed vectors  in 
-                     else a path that contain that filled folder
+                     else a path that contain that filled folder, vectors are saved as one memory-mapped
+                     float32 matrix per folder (older folders of per-document .truth files are still read)
 }
 ```
+With "sweep", vectors missing from vectorsDir are extracted once per test dataset, every grid point
+is then evaluated against the memory-mapped vectors and the metrics are written to one csv table
+in resultDir instead of per-run predictions and results.
 """
 
 methods = {
@@ -63,44 +108,214 @@ def process_results(test, task, name, results):
           format(test, task, name, results[0], results[1], results[2], results[3]))
 
 
-def eval(config):
+def build_model(config, hyperparams, features):
+    method = methods[config["model"]["name"]]
+    if config["model"]["name"] in ["ac", "karas"]:
+        return method(hyperparams, features, annotation_batch=config.get("annotation_batch"),
+                      execution=config.get("execution"))
+    return method(hyperparams, features)
+
+
+def vectors_folder_name(config, test_dir):
+    return "-".join([os.path.split(test_dir)[-1], str(config["features"]["selection"]), str(config["features"]["pca"])])
+
+
+@lru_cache(maxsize=4)
+def load_vector_docs(test_dir, vecpath, shard_items):
+    # a worker evaluates several grid points on the same memory-mapped vectors
+    return list(iter_docs(test_dir, vecpath=vecpath, **dict(shard_items)))
+
+
+def evaluate_grid_points(jobs):
+    results = []
+    for model_name, hyperparams, test_dir, vecpath, shard_items, predict_breaches in jobs:
+        docs = load_vector_docs(test_dir, vecpath, shard_items)
+        # documents are already spread over the sweep workers
+        model = methods[model_name](hyperparams, [])
+        predictions = model.test([(text, vector, truth) for _, text, vector, truth in docs], True)[0]
+        results.append(evaluation17.evaluate([(name, text, truth) for name, text, _, truth in docs],
+                                             predictions, predict_breaches))
+    return results
+
+
+def sweep(config, features, annotation_store=None):
+    """Evaluates every combination of the hyperparams of config["sweep"]["grid"] on the saved vectors."""
+    if config["model"]["name"] not in ["ac", "karas"]:
+        raise ValueError("Hyperparams sweeps need the vectors of \"ac\" or \"karas\", not \"{}\"".format(
+            config["model"]["name"]))
+    grid = [list(hyperparams) for hyperparams in product(*config["sweep"]["grid"])]
+    shard = config.get("shard", {})
+    predict_breaches = "style_breach" == config["task"]
+
+    jobs = []
+    for test_dir in config["datasets"]["test"]:
+        vecpath = os.path.join(config["vectorsDir"], vectors_folder_name(config, test_dir))
+        # the store may already hold the vectors of other shards of the dataset
+        saved = VectorStore(vecpath) if is_vector_store(vecpath) else {}
+        missing = (doc for doc in iter_docs(test_dir, **shard) if os.path.splitext(doc[0])[0] not in saved)
+        model = build_model(config, grid[0], features)
+        writer = None
+        for doc, (_, vectors) in iter_with_checkpoint(missing, model_tester(config, model, False)):
+            if writer is None:
+                writer = VectorStoreWriter(vecpath, list(feature_extractors.keys()))
+            writer.add(os.path.splitext(doc[0])[0], vectors)
+        if writer is not None:
+            writer.close()
+        jobs.extend((config["model"]["name"], hyperparams, test_dir, vecpath, tuple(shard.items()), predict_breaches)
+                    for hyperparams in grid)
+    if annotation_store is not None:
+        # the grid points only read saved vectors, their workers need no annotation store
+        annotation_store.close()
+        set_annotation_store(None)
+
+    name = "-".join(["sweep", config["task"], config["model"]["name"],
+                     str(config["features"]["selection"]), str(config["features"]["pca"])])
+    if not os.path.exists(config["resultDir"]):
+        os.makedirs(config["resultDir"])
+    with open(os.path.join(config["resultDir"], name + ".csv"), "w", encoding="utf8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["dataset", "hyperparams", "winP", "winR", "winF", "Acc"])
+        results = map_documents(evaluate_grid_points, jobs, workers=config["sweep"].get("workers", 1), chunk_size=1)
+        for (_, hyperparams, test_dir, _, _, _), result in zip(jobs, results):
+            process_results(test_dir, config["task"], "{} {}".format(config["model"]["name"], hyperparams), result)
+            writer.writerow([os.path.split(test_dir)[-1], "-".join(str(v) for v in hyperparams)] + list(result))
+            f.flush()
+    print("nlp pipelines:", registry.report())
+
+
+def load_stage(docs):
+    """Yields the documents, timing their reading as the "load" stage."""
+    iterator = iter(docs)
+    while True:
+        with profiler.stage("load"):
+            doc = next(iterator, None)
+        if doc is None:
+            return
+        yield doc
+
+
+def model_tester(config, model, use_vectors):
+    """Returns a function that maps a stream of documents to a stream of their (prediction, vectors)."""
+    if config["model"]["name"] in ["ac", "karas"]:
+        return lambda docs: model.iter_test((doc[1:] for doc in docs), use_vectors)
+    if config["model"]["name"] == "nath":
+        return lambda docs: ((prediction, None) for prediction in model.iter_test(doc[1:] for doc in docs))
+    # zlatkova predicts the whole test set at once
+    return lambda docs: [(prediction, None) for prediction in model.test([doc[1:] for doc in docs])]
+
+
+def iter_with_checkpoint(docs, test, checkpoint=None):
+    """Yields every document with its (prediction, vectors) in input order.
+
+    `test` only gets the documents without checkpointed results, it reads them lazily, so only the
+    documents it has read ahead are buffered. Checkpointed results are read back, new ones are
+    checkpointed as they arrive.
+    """
+    done = checkpoint.done() if checkpoint is not None else set()
+    if checkpoint is not None:
+        print("checkpoint {}: {} documents done".format(checkpoint.path, len(done)))
+    read = deque()  # the documents read so far and whether they are checkpointed
+
+    def todo():
+        for doc in docs:
+            read.append((doc, doc[0] in done))
+            if doc[0] not in done:
+                yield doc
+
+    for result in test(todo()):
+        doc, checkpointed = read.popleft()
+        while checkpointed:
+            yield doc, checkpoint.load(doc[0])
+            doc, checkpointed = read.popleft()
+        if checkpoint is not None:
+            checkpoint.save(doc[0], *result)
+        yield doc, result
+    while read:
+        doc, _ = read.popleft()
+        yield doc, checkpoint.load(doc[0])
+    if checkpoint is not None:
+        checkpoint.finish()
+
+
+def eval(config, resume=False):
     features = feature_extractors.keys()
     if config["features"]["selection"]:
         features = [feature_selection(feature) for feature in features]
     if config["features"]["pca"]:
         features = pca(features)
 
-    method = methods[config["model"]["name"]]
-    model = method(config["model"]["hyperparams"], features)
+    annotation_store = None
+    if config.get("annotation_store"):
+        annotation_store = AnnotationStore(**config["annotation_store"])
+        set_annotation_store(annotation_store)
+
+    if config.get("sweep"):
+        return sweep(config, features, annotation_store)
+
+    if config.get("profiling"):
+        profiler.configure(**config["profiling"])
+
+    model = build_model(config, config["model"]["hyperparams"], features)
     if config["model"].get("trainable", False):
         model.train(get_docs(config["datasets"]["train"]), get_docs(config["datasets"]["dev"]))
 
+    shard = config.get("shard", {})
+    predict_breaches = "style_breach" == config["task"]
     for test_dir in config["datasets"]["test"]:
-        docs = get_docs(path=test_dir)
-        texts = [(text, dictionary) for _, text, dictionary in docs]
-
+        use_vectors = False
+        vecpath = None
+        writer = None
+        checkpoint = None
         if config["model"]["name"] in ["ac", "karas"]:
-            folder_name = "-".join(
-                [os.path.split(test_dir)[-1], str(config["features"]["selection"]), str(config["features"]["pca"])])
+            folder_name = vectors_folder_name(config, test_dir)
             use_vectors = config["use_vectors"]
-            if config["use_vectors"]:
-                vecs_for_algorithm = get_vecs(path=test_dir, vecpath=os.path.join(config["vectorsDir"], folder_name))
-                texts = [(text, vector, dictionary) for _, text, vector, dictionary in vecs_for_algorithm]
-            predictions_and_vectors = model.test(texts, use_vectors)
-            predictions = predictions_and_vectors[0]
-            vectors = predictions_and_vectors[1]
-            if not use_vectors:
-                save_vectors(docs, vectors, config, folder_name)
-        else:
-            predictions = model.test(texts)
-
-    save_predictions(docs, predictions, config, os.path.split(test_dir)[-1])
-    results = evaluation17.main(docs, predictions, "style_breach" == config["task"], config,
-                                os.path.split(test_dir)[-1])
-    process_results(test_dir, config["task"], config["model"]["name"], results)
+            if use_vectors:
+                vecpath = vectors_dir(config, folder_name)
+            else:
+                writer = VectorStoreWriter(vectors_dir(config, folder_name), list(feature_extractors.keys()))
+            if config.get("checkpoint"):
+                checkpoint = Checkpoint(config["checkpoint"]["path"], config, os.path.split(test_dir)[-1], resume)
+        # documents are streamed through the model, only their evaluation results are kept
+        docs = load_stage(iter_docs(test_dir, vecpath=vecpath, **shard))
+
+        save_dir = predictions_dir(config, os.path.split(test_dir)[-1])
+        document_results = []
+        for doc, (prediction, vectors) in iter_with_checkpoint(docs, model_tester(config, model, use_vectors),
+                                                               checkpoint):
+            profiler.name_documents([doc])
+            with profiler.stage("saving"):
+                save_prediction(save_dir, doc[0], doc[1], prediction)
+                if writer is not None:
+                    writer.add(os.path.splitext(doc[0])[0], vectors)
+            with profiler.stage("evaluation"):
+                document_results.append(evaluation17.evaluate_document(doc[1], doc[-1], prediction, predict_breaches))
+        if writer is not None:
+            with profiler.stage("saving"):
+                writer.close()
+
+        data_name = os.path.split(test_dir)[-1]
+        if shard:
+            data_name += "-shard{}".format("-".join(str(v) for v in shard.values()))
+        with profiler.stage("evaluation"):
+            results = evaluation17.summarize(document_results, predict_breaches)
+            evaluation17.write_results(results, config, data_name)
+        process_results(test_dir, config["task"], config["model"]["name"], results)
+    if annotation_store is not None:
+        annotation_store.close()
+    print("nlp pipelines:", registry.report())
+    profile = profiler.report()
+    if profile is not None:
+        print("stage seconds:", {name: round(stage["seconds"], 2) for name, stage in sorted(
+            profile["stages"].items(), key=lambda item: -item[1]["seconds"])})
 
 
 if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--resume", action="store_true",
+                        help="skip the documents checkpointed by an earlier run of the same configuration")
+    args = parser.parse_args()
     with open("config.json", "r", encoding="utf8") as config_json:
         config = json.load(config_json)
-    eval(config)
+    if args.resume and not config.get("checkpoint"):
+        sys.exit("--resume needs a \"checkpoint\" path in config.json")
+    eval(config, resume=args.resume)
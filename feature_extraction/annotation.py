@@ -0,0 +1,173 @@
+import bisect
+from typing import Tuple, List, Iterable, Iterator
+from .utils import nlp_stanza
+
+Token = Tuple[str, str, str, str]
+
+# stanza never lets a sentence cross a blank line, so joined texts split back cleanly
+TEXT_SEPARATOR = "\n\n"
+
+annotation_store = None
+
+
+def set_annotation_store(store):
+    global annotation_store
+    annotation_store = store
+
+
+def _sentence_tokens(sentence) -> List[Token]:
+    return [(word.text, word.lemma, word.pos, word.deprel) for word in sentence.words]
+
+
+def annotate(text: str) -> List[List[Token]]:
+    if annotation_store is not None:
+        tokens = annotation_store.get(text)
+        if tokens is not None:
+            return tokens
+    doc = nlp_stanza(text)
+    tokens = [_sentence_tokens(sentence) for sentence in doc.sentences]
+    if annotation_store is not None:
+        annotation_store.put(text, tokens)
+    return tokens
+
+
+def annotate_batch(texts: List[str], batch_size: int = 64, max_chars: int = 20000) -> List[List[List[Token]]]:
+    """Annotates many texts with as few stanza calls as possible.
+
+    Texts missing from the annotation store are joined with blank lines into batches of at most
+    `batch_size` texts and `max_chars` characters (a longer text makes a batch of its own), the
+    parsed sentences are mapped back to their texts by character offsets.
+    """
+    results = [None] * len(texts)
+    batch = []
+    batch_chars = 0
+    for i, text in enumerate(texts):
+        if annotation_store is not None:
+            results[i] = annotation_store.get(text)
+            if results[i] is not None:
+                continue
+        if batch and (len(batch) >= batch_size or batch_chars + len(text) > max_chars):
+            _annotate_joined(texts, batch, results)
+            batch = []
+            batch_chars = 0
+        batch.append(i)
+        batch_chars += len(text) + len(TEXT_SEPARATOR)
+    if batch:
+        _annotate_joined(texts, batch, results)
+    return results
+
+
+def _annotate_joined(texts: List[str], indices: List[int], results: List):
+    starts = []
+    offset = 0
+    for i in indices:
+        starts.append(offset)
+        offset += len(texts[i]) + len(TEXT_SEPARATOR)
+    doc = nlp_stanza(TEXT_SEPARATOR.join(texts[i] for i in indices))
+    batch_tokens = [[] for _ in indices]
+    for sentence in doc.sentences:
+        position = bisect.bisect_right(starts, sentence.tokens[0].start_char) - 1
+        batch_tokens[position].append(_sentence_tokens(sentence))
+    for i, tokens in zip(indices, batch_tokens):
+        results[i] = tokens
+        if annotation_store is not None:
+            annotation_store.put(texts[i], tokens)
+
+
+def iter_annotated_documents(documents: Iterable[Tuple[str, List[str]]], batch_size: int = 64,
+                             max_chars: int = 20000, with_text: bool = True) -> Iterator["DocumentAnnotation"]:
+    """Yields fully annotated documents in input order, paragraphs of neighbouring documents share stanza batches.
+
+    Only as many documents are buffered as needed to fill one batch. `with_text` also annotates
+    the whole text of each document, which is only needed for document-level aggregates.
+    """
+    buffered = []
+    buffered_texts = 0
+    buffered_chars = 0
+    for text, paragraphs in documents:
+        buffered.append(DocumentAnnotation(text, paragraphs))
+        buffered_texts += len(paragraphs) + int(with_text)
+        buffered_chars += len(text) * (1 + int(with_text))
+        if buffered_texts >= batch_size or buffered_chars >= max_chars:
+            _annotate_documents(buffered, batch_size, max_chars, with_text)
+            for annotation in buffered:
+                yield annotation
+            buffered = []
+            buffered_texts = 0
+            buffered_chars = 0
+    if buffered:
+        _annotate_documents(buffered, batch_size, max_chars, with_text)
+        for annotation in buffered:
+            yield annotation
+
+
+def _annotate_documents(annotations: List["DocumentAnnotation"], batch_size: int, max_chars: int, with_text: bool):
+    texts = []
+    for annotation in annotations:
+        texts.extend(annotation.paragraphs)
+        if with_text:
+            texts.append(annotation.text)
+    tokens = iter(annotate_batch(texts, batch_size, max_chars))
+    for annotation in annotations:
+        for i in range(len(annotation)):
+            annotation.set_paragraph(i, next(tokens))
+        if with_text:
+            annotation.set_sentences(next(tokens))
+
+
+class DocumentAnnotation(object):
+    """Parses a document once and shares the annotations between all feature extractors.
+
+    Paragraphs are annotated on first access, the whole text is annotated at most once
+    and only when a document-level aggregate is requested.
+    """
+
+    def __init__(self, text: str, paragraphs: List[str] = None):
+        self.text = text
+        self.paragraphs = paragraphs if paragraphs is not None else text.split('\n')
+        self._paragraph_tokens = [None] * len(self.paragraphs)
+        self._sentences = None
+        self._aggregates = None
+
+    def __len__(self):
+        return len(self.paragraphs)
+
+    def paragraph(self, index: int) -> List[List[Token]]:
+        if self._paragraph_tokens[index] is None:
+            self._paragraph_tokens[index] = annotate(self.paragraphs[index])
+        return self._paragraph_tokens[index]
+
+    def set_paragraph(self, index: int, tokens: List[List[Token]]):
+        self._paragraph_tokens[index] = tokens
+
+    def set_sentences(self, tokens: List[List[Token]]):
+        self._sentences = tokens
+        self._aggregates = None
+
+    @property
+    def sentences(self) -> List[List[Token]]:
+        if self._sentences is None:
+            self._sentences = annotate(self.text)
+        return self._sentences
+
+    @property
+    def avg_sent_len_by_symbols(self) -> float:
+        return self._get_aggregates()[0]
+
+    @property
+    def avg_sent_len_by_words(self) -> float:
+        return self._get_aggregates()[1]
+
+    @property
+    def avg_word_len(self) -> float:
+        return self._get_aggregates()[2]
+
+    def _get_aggregates(self):
+        if self._aggregates is None:
+            sentences = self.sentences
+            words_count = sum(len(sentence) for sentence in sentences)
+            symbols_count = sum(len(word[0]) for sentence in sentences for word in sentence)
+            self._aggregates = (float(symbols_count / len(sentences)),
+                                float(words_count / len(sentences)),
+                                symbols_count / words_count)
+        return self._aggregates
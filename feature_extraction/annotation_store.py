@@ -0,0 +1,145 @@
+import os
+import json
+import zlib
+import pickle
+import hashlib
+from typing import List, Tuple
+from .utils import STANZA_LANG, STANZA_PROCESSORS
+
+DATA_FILE = "annotations.bin"
+INDEX_FILE = "index.json"
+
+
+def pipeline_version(lang: str = STANZA_LANG, processors: str = STANZA_PROCESSORS):
+    # annotations are only reusable with the same stanza release (and its models) and processors
+    import stanza
+    key = "|".join([stanza.__version__, lang, processors.replace(' ', '')])
+    return hashlib.sha1(key.encode("utf8")).hexdigest()[:16]
+
+
+def content_hash(text: str):
+    return hashlib.sha1(text.encode("utf8")).hexdigest()
+
+
+class AnnotationStore(object):
+    """Content-addressed on-disk store of paragraph annotations.
+
+    Annotations are compressed pickles appended to a single data file, the index maps a text hash
+    to its (offset, length, last use) record. Each pipeline version gets its own subdirectory, when
+    the data file grows over `max_size_mb` the least recently used entries are dropped.
+    A read-only store never writes, any number of them can share the directory with one writer. It
+    keeps the annotations put into it until `pop_new`, so the writer can store them.
+    """
+
+    def __init__(self, path: str, max_size_mb: float = 1024, version: str = None, read_only: bool = False):
+        self.root = path
+        self.version = version or pipeline_version()
+        self.path = os.path.join(path, self.version)
+        self.max_size_mb = max_size_mb
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.read_only = read_only
+        os.makedirs(self.path, exist_ok=True)
+        self._clock = 0
+        self._index = {}
+        self._unsaved = 0
+        self._new = {}
+        self._load_index()
+        data_path = os.path.join(self.path, DATA_FILE)
+        if read_only and not os.path.exists(data_path):
+            open(data_path, "ab").close()
+        self._data = open(data_path, "rb" if read_only else "ab+")
+        self._size = self._data.seek(0, os.SEEK_END)
+        # drops entries written after the last index flush of a killed run
+        self._index = {key: entry for key, entry in self._index.items() if entry[0] + entry[1] <= self._size}
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, text: str):
+        return content_hash(text) in self._index
+
+    def get(self, text: str):
+        entry = self._index.get(content_hash(text))
+        if entry is None:
+            return None
+        self._data.seek(entry[0])
+        blob = self._data.read(entry[1])
+        self._clock += 1
+        entry[2] = self._clock
+        return pickle.loads(zlib.decompress(blob))
+
+    def put(self, text: str, tokens: List[List[Tuple[str, str, str, str]]]):
+        key = content_hash(text)
+        if key in self._index:
+            return
+        if self.read_only:
+            self._new[key] = (text, tokens)
+            return
+        blob = zlib.compress(pickle.dumps(tokens, protocol=pickle.HIGHEST_PROTOCOL))
+        self._data.seek(0, os.SEEK_END)
+        self._data.write(blob)
+        self._clock += 1
+        self._index[key] = [self._size, len(blob), self._clock]
+        self._size += len(blob)
+        self._unsaved += 1
+        if self._size > self.max_bytes:
+            self._evict()
+        elif self._unsaved >= 1000:
+            self.flush()
+
+    def flush(self):
+        if self.read_only:
+            return
+        self._data.flush()
+        index_path = os.path.join(self.path, INDEX_FILE)
+        with open(index_path + ".tmp", "w", encoding="utf8") as f:
+            json.dump({"clock": self._clock, "entries": self._index}, f)
+        os.replace(index_path + ".tmp", index_path)
+        self._unsaved = 0
+
+    def close(self):
+        self.flush()
+        self._data.close()
+
+    def pop_new(self) -> List[Tuple[str, List[List[Tuple[str, str, str, str]]]]]:
+        """Returns and forgets the (text, tokens) put into a read-only store since the last call."""
+        new = list(self._new.values())
+        self._new = {}
+        return new
+
+    def _load_index(self):
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf8") as f:
+                index = json.load(f)
+            self._clock = index["clock"]
+            self._index = index["entries"]
+
+    def _evict(self):
+        # keeps the most recently used entries that fit into 80% of the budget and compacts the data file
+        budget = int(self.max_bytes * 0.8)
+        kept = {}
+        size = 0
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1][2], reverse=True):
+            if size + entry[1] > budget:
+                break
+            kept[key] = entry
+            size += entry[1]
+        data_path = os.path.join(self.path, DATA_FILE)
+        offset = 0
+        with open(data_path + ".tmp", "wb") as compacted:
+            for key, entry in sorted(kept.items(), key=lambda item: item[1][0]):
+                self._data.seek(entry[0])
+                compacted.write(self._data.read(entry[1]))
+                kept[key] = [offset, entry[1], entry[2]]
+                offset += entry[1]
+        self._data.close()
+        # a stale index must never point into the compacted file
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        os.replace(data_path + ".tmp", data_path)
+        self._data = open(data_path, "ab+")
+        self._index = kept
+        self._size = offset
+        self.flush()
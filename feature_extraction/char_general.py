@@ -1,65 +1,62 @@
 from typing import Tuple, List
 import os
 from .utils import EXTERNAL_DIR
+from .lexicon_matcher import LexiconMatcher
 
 try:
     with open(os.path.join(EXTERNAL_DIR, "suffixes.txt"), 'r', encoding="utf8") as fin:
         SUFFIXES_LIST = fin.read().splitlines()
+    SUFFIX_MATCHER = LexiconMatcher(SUFFIXES_LIST)
 except Exception as e:
     print("Failed to read suffixes.txt. Skipping suffix features.")
 
 try:
     with open(os.path.join(EXTERNAL_DIR, "prefixes.txt"), 'r', encoding="utf8") as fin:
         PREFIXES_LIST = fin.read().splitlines()
+    PREFIX_MATCHER = LexiconMatcher(PREFIXES_LIST)
 except Exception as e:
     print("Failed to read prefixes.txt. Skipping prefix features.")
 
 
 def extract_char_general_features(text: str, paragraph: List[List[Tuple[str, str, str, str]]], feature_names=None):
     features = []
-    if feature_names is None:
-        for feature in char_general_features.values():
-            features.extend(feature(text, paragraph))
-    else:
-        for feature in feature_names:
-            features.extend(char_general_features[feature](text, paragraph))
+    names = char_general_features.keys() if feature_names is None else feature_names
+    # affixes of the paragraph words are matched once for all requested features
+    counts = _count_affixes(paragraph, names)
+    for feature in names:
+        features.extend(char_general_features[feature](text, paragraph, counts))
     return features
 
 
-def suffixes_freq(text: str, paragraph: List[List[Tuple[str, str, str, str]]]):
-    feature = []
+def _count_affixes(paragraph: List[List[Tuple[str, str, str, str]]], feature_names=None):
+    feature_names = char_general_features.keys() if feature_names is None else feature_names
     paragraph_words = [item[0] for sentence in paragraph for item in sentence]
-    for suffix in SUFFIXES_LIST:
-        matches_count = sum(word.endswith(suffix) for word in paragraph_words)
-        feature.append(matches_count)
-    return [float(feat / len(paragraph_words)) for feat in feature]
+    counts = {"words": len(paragraph_words)}
+    if any(name.startswith("suffixes") for name in feature_names):
+        counts.update(SUFFIX_MATCHER.count(paragraph_words, kinds=["suffix"]))
+    if any(name.startswith("prefixes") for name in feature_names):
+        counts.update(PREFIX_MATCHER.count(paragraph_words, kinds=["prefix"]))
+    return counts
 
 
-def prefixes_freq(text: str, paragraph: List[List[Tuple[str, str, str, str]]]):
-    feature = []
-    paragraph_words = [item[0] for sentence in paragraph for item in sentence]
-    for prefix in PREFIXES_LIST:
-        matches_count = sum(word.startswith(prefix) for word in paragraph_words)
-        feature.append(matches_count)
-    return [float(feat / len(paragraph_words)) for feat in feature]
+def suffixes_freq(text: str, paragraph: List[List[Tuple[str, str, str, str]]], counts=None):
+    counts = counts or _count_affixes(paragraph, ["suffixes_frequency"])
+    return [float(feat / counts["words"]) for feat in SUFFIX_MATCHER.vector(counts["suffix"])]
 
 
-def suffixes_occurrence(text: str, paragraph: List[List[Tuple[str, str, str, str]]]):
-    feature = []
-    paragraph_words = [item[0] for sentence in paragraph for item in sentence]
-    for suffix in SUFFIXES_LIST:
-        occurrence = any(word.endswith(suffix) for word in paragraph_words)
-        feature.append(float(occurrence))
-    return feature
+def prefixes_freq(text: str, paragraph: List[List[Tuple[str, str, str, str]]], counts=None):
+    counts = counts or _count_affixes(paragraph, ["prefixes_frequency"])
+    return [float(feat / counts["words"]) for feat in PREFIX_MATCHER.vector(counts["prefix"])]
 
 
-def prefixes_occurrence(text: str, paragraph: List[List[Tuple[str, str, str, str]]]):
-    feature = []
-    paragraph_words = [item[0] for sentence in paragraph for item in sentence]
-    for prefix in PREFIXES_LIST:
-        occurrence = any(word.startswith(prefix) for word in paragraph_words)
-        feature.append(float(occurrence))
-    return feature
+def suffixes_occurrence(text: str, paragraph: List[List[Tuple[str, str, str, str]]], counts=None):
+    counts = counts or _count_affixes(paragraph, ["suffixes_occurrence"])
+    return [float(feat > 0) for feat in SUFFIX_MATCHER.vector(counts["suffix"])]
+
+
+def prefixes_occurrence(text: str, paragraph: List[List[Tuple[str, str, str, str]]], counts=None):
+    counts = counts or _count_affixes(paragraph, ["prefixes_occurrence"])
+    return [float(feat > 0) for feat in PREFIX_MATCHER.vector(counts["prefix"])]
 
 
 char_general_features = {
@@ -1,100 +1,86 @@
 from typing import Tuple, List
 import os
 from .utils import EXTERNAL_DIR
+from .lexicon_matcher import LexiconMatcher
 
 try:
     punct_path = os.path.join(EXTERNAL_DIR, "puncts.txt")
     with open(punct_path, 'r', encoding="utf8") as fin:
         PUNCT_LIST = fin.read().splitlines()
+    PUNCT_MATCHER = LexiconMatcher(PUNCT_LIST)
 except Exception as e:
     print("Failed to read puncts.txt. Skipping punctuation features.")
 
 
 def extract_char_punct_features(text: str, paragraph: List[List[Tuple[str, str, str, str]]], feature_names=None):
     features = []
-    if feature_names is None:
-        for feature in char_punctuation_features.values():
-            features.extend(feature(text, paragraph))
-    else:
-        for feature in feature_names:
-            features.extend(char_punctuation_features[feature](text, paragraph))
+    names = char_punctuation_features.keys() if feature_names is None else feature_names
+    # punctuation marks of the paragraph words are matched once for all requested features
+    counts = _count_puncts(paragraph, names)
+    for feature in names:
+        features.extend(char_punctuation_features[feature](text, paragraph, counts=counts))
     return features
 
 
-def puncts_occurrence(text: str, paragraph: List[List[Tuple[str, str, str, str]]], punct: str = None):
-    feature = []
+def _count_puncts(paragraph: List[List[Tuple[str, str, str, str]]], feature_names=None):
+    feature_names = char_punctuation_features.keys() if feature_names is None else feature_names
     paragraph_words = [item[0] for sentence in paragraph for item in sentence]
-    if punct is None:
-        for punctuation in PUNCT_LIST:
-            occurrence = any(word.find(punctuation) != -1 for word in paragraph_words)
-            feature.append(float(occurrence))
-    else:
-        feature = [float(any(word.find(punct) != -1 for word in paragraph_words))]
-    return feature
+    kinds = {feature_match_kinds[name] for name in feature_names}
+    counts = PUNCT_MATCHER.count(paragraph_words, kinds=kinds)
+    counts["words"] = len(paragraph_words)
+    return counts
 
 
-def puncts_freq(text: str, paragraph: List[List[Tuple[str, str, str, str]]], punct: str = None):
-    feature = []
-    paragraph_words = [item[0] for sentence in paragraph for item in sentence]
-    if punct is None:
-        for punctuation in PUNCT_LIST:
-            matches_count = sum(word.find(punctuation) != -1 for word in paragraph_words)
-            feature.append(float(matches_count))
-    else:
-        feature = [float(sum(word.find(punct) != -1 for word in paragraph_words))]
-    return [feat / len(paragraph_words) for feat in feature]
+def puncts_occurrence(text: str, paragraph: List[List[Tuple[str, str, str, str]]], punct: str = None, counts=None):
+    if punct is not None:
+        paragraph_words = [item[0] for sentence in paragraph for item in sentence]
+        return [float(any(word.find(punct) != -1 for word in paragraph_words))]
+    counts = counts or _count_puncts(paragraph, ["puncts_occurrence"])
+    return [float(feat > 0) for feat in PUNCT_MATCHER.vector(counts["infix"])]
+
 
+def puncts_freq(text: str, paragraph: List[List[Tuple[str, str, str, str]]], punct: str = None, counts=None):
+    if punct is not None:
+        paragraph_words = [item[0] for sentence in paragraph for item in sentence]
+        return [float(sum(word.find(punct) != -1 for word in paragraph_words)) / len(paragraph_words)]
+    counts = counts or _count_puncts(paragraph, ["puncts_frequency"])
+    return [float(feat) / counts["words"] for feat in PUNCT_MATCHER.vector(counts["infix"])]
 
-def before_spaced_puncts_occurrence(text: str, paragraph: List[List[Tuple[str, str, str, str]]], punct: str = None):
+
+def before_spaced_puncts_occurrence(text: str, paragraph: List[List[Tuple[str, str, str, str]]], punct: str = None, counts=None):
     # Warning: if punctuation mark is separated as a single word-token, it won't be computed in feature
-    feature = []
-    paragraph_words = [item[0] for sentence in paragraph for item in sentence]
-    if punct is None:
-        for punctuation in PUNCT_LIST:
-            occurrence = any(word.startswith(punctuation) and word != punctuation for word in paragraph_words)
-            feature.append(float(occurrence))
-    else:
-        feature = [float(any(word.startswith(punct) and word != punct for word in paragraph_words))]
-    return feature
+    if punct is not None:
+        paragraph_words = [item[0] for sentence in paragraph for item in sentence]
+        return [float(any(word.startswith(punct) and word != punct for word in paragraph_words))]
+    counts = counts or _count_puncts(paragraph, ["before_spaced_puncts_occurrence"])
+    return [float(feat > 0) for feat in PUNCT_MATCHER.vector(counts["proper_prefix"])]
 
 
-def before_spaced_puncts_freq(text: str, paragraph: List[List[Tuple[str, str, str, str]]], punct: str = None):
+def before_spaced_puncts_freq(text: str, paragraph: List[List[Tuple[str, str, str, str]]], punct: str = None, counts=None):
     # note if punctuation mark is separated as a single word-token, it won't be computed in feature
-    feature = []
-    paragraph_words = [item[0] for sentence in paragraph for item in sentence]
-    if punct is None:
-        for punctuation in PUNCT_LIST:
-            matches_count = sum(word.startswith(punctuation) and word != punctuation for word in paragraph_words)
-            feature.append(float(matches_count))
-    else:
-        feature = [float(sum(word.startswith(punct) and word != punct for word in paragraph_words))]
-    return [feat / len(paragraph_words) for feat in feature]
+    if punct is not None:
+        paragraph_words = [item[0] for sentence in paragraph for item in sentence]
+        return [float(sum(word.startswith(punct) and word != punct for word in paragraph_words)) / len(paragraph_words)]
+    counts = counts or _count_puncts(paragraph, ["before_spaced_puncts_frequency"])
+    return [float(feat) / counts["words"] for feat in PUNCT_MATCHER.vector(counts["proper_prefix"])]
 
 
-def after_spaced_puncts_occurrence(text: str, paragraph: List[List[Tuple[str, str, str, str]]], punct: str = None):
+def after_spaced_puncts_occurrence(text: str, paragraph: List[List[Tuple[str, str, str, str]]], punct: str = None, counts=None):
     # Warning: if punctuation mark is separated as a single word-token, it won't be computed in feature
-    feature = []
-    paragraph_words = [item[0] for sentence in paragraph for item in sentence]
-    if punct is None:
-        for punctuation in PUNCT_LIST:
-            occurrence = any(word.endswith(punctuation) and word != punctuation for word in paragraph_words)
-            feature.append(float(occurrence))
-    else:
-        feature = [float(any(word.endswith(punct) and word != punct for word in paragraph_words))]
-    return feature
+    if punct is not None:
+        paragraph_words = [item[0] for sentence in paragraph for item in sentence]
+        return [float(any(word.endswith(punct) and word != punct for word in paragraph_words))]
+    counts = counts or _count_puncts(paragraph, ["after_spaced_puncts_occurence"])
+    return [float(feat > 0) for feat in PUNCT_MATCHER.vector(counts["proper_suffix"])]
 
 
-def after_spaced_puncts_freq(text: str, paragraph: List[List[Tuple[str, str, str, str]]], punct: str = None):
+def after_spaced_puncts_freq(text: str, paragraph: List[List[Tuple[str, str, str, str]]], punct: str = None, counts=None):
     # note if punctuation mark is separated as a single word-token, it won't be computed in feature
-    feature = []
-    paragraph_words = [item[0] for sentence in paragraph for item in sentence]
-    if punct is None:
-        for punctuation in PUNCT_LIST:
-            matches_count = sum(word.endswith(punctuation) and word != punctuation for word in paragraph_words)
-            feature.append(float(matches_count))
-    else:
-        feature = [float(sum(word.endswith(punct) and word != punct for word in paragraph_words))]
-    return [feat / len(paragraph_words) for feat in feature]
+    if punct is not None:
+        paragraph_words = [item[0] for sentence in paragraph for item in sentence]
+        return [float(sum(word.endswith(punct) and word != punct for word in paragraph_words)) / len(paragraph_words)]
+    counts = counts or _count_puncts(paragraph, ["after_spaced_puncts_frequency"])
+    return [float(feat) / counts["words"] for feat in PUNCT_MATCHER.vector(counts["proper_suffix"])]
 
 
 char_punctuation_features = {
@@ -104,4 +90,13 @@ char_punctuation_features = {
     "puncts_frequency": puncts_freq,
     "before_spaced_puncts_frequency": before_spaced_puncts_freq,
     "after_spaced_puncts_frequency": after_spaced_puncts_freq
-}
\ No newline at end of file
+}
+
+feature_match_kinds = {
+    "puncts_occurrence": "infix",
+    "before_spaced_puncts_occurrence": "proper_prefix",
+    "after_spaced_puncts_occurence": "proper_suffix",
+    "puncts_frequency": "infix",
+    "before_spaced_puncts_frequency": "proper_prefix",
+    "after_spaced_puncts_frequency": "proper_suffix"
+}
@@ -1,5 +1,6 @@
 from typing import List
-from .utils import nlp_stanza
+from .annotation import DocumentAnnotation
+from profiling import profiler
 from feature_extraction import extract_char_punct_features, extract_char_general_features, \
     extract_ngram_features, extract_abbreviation_features, extract_number_features, extract_word_general_features,\
     extract_sent_morphological_features, extract_sent_syntactic_features, extract_sent_general_features,\
@@ -19,14 +20,31 @@ feature_extractors = {
 }
 
 
-def compute_feature_vectors(text: str, paragraphs: List[str], feature_names: List[str]):
+# extractors that read document-level aggregates from the shared annotation
+annotation_extractors = {"word_others", "sent_other"}
+
+
+def needs_document_annotation(feature_names: List[str]):
+    return any(extract_name in annotation_extractors for extract_name in feature_names)
+
+
+def extract_features(extract_name: str, annotation: DocumentAnnotation, index: int):
+    extractor = feature_extractors[extract_name]
+    if extract_name in annotation_extractors:
+        return extractor(annotation.text, annotation.paragraph(index), annotation=annotation)
+    return extractor(annotation.text, annotation.paragraph(index))
+
+
+def compute_feature_vectors(text: str, paragraphs: List[str], feature_names: List[str],
+                            annotation: DocumentAnnotation = None):
+    if annotation is None:
+        annotation = DocumentAnnotation(text, paragraphs)
+    profiler.count("paragraphs", len(paragraphs))
     feat_vectors = []
-    for par in paragraphs:
+    for i in range(len(paragraphs)):
         par_feat_vec = []
-        par_doc = nlp_stanza(par)
         for extract_name in feature_names:
-            par_feat_vec.extend(feature_extractors[extract_name](text,
-                                                                 [[(w.text, w.lemma, w.pos, w.deprel)
-                                                                  for w in sent.words] for sent in par_doc.sentences]))
+            with profiler.stage("features/" + extract_name):
+                par_feat_vec.extend(extract_features(extract_name, annotation, i))
         feat_vectors.append(par_feat_vec)
     return feat_vectors
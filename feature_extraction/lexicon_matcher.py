@@ -0,0 +1,60 @@
+from collections import Counter
+from typing import Iterable, List
+
+# "prefix" and "suffix" count the words starting or ending with an entry, "proper_" variants skip
+# the words equal to the entry, "infix" counts the words containing the entry
+MATCH_KINDS = ("prefix", "suffix", "proper_prefix", "proper_suffix", "infix")
+
+
+class LexiconMatcher(object):
+    """Matches words against all entries of a lexicon at once.
+
+    The entries are kept in a hash set, so a word is matched by looking up each of its affixes
+    (or substrings) not longer than the longest entry instead of testing every entry in turn.
+    """
+
+    def __init__(self, lexicon: Iterable[str]):
+        self.lexicon = list(lexicon)
+        self._entries = set(self.lexicon)
+        self._max_len = max(map(len, self._entries), default=0)
+
+    def _prefixes(self, word: str):
+        for length in range(min(len(word), self._max_len) + 1):
+            if word[:length] in self._entries:
+                yield word[:length]
+
+    def _suffixes(self, word: str):
+        for length in range(min(len(word), self._max_len) + 1):
+            if word[len(word) - length:] in self._entries:
+                yield word[len(word) - length:]
+
+    def _infixes(self, word: str):
+        found = set()
+        for start in range(len(word) + 1):
+            for end in range(start, min(len(word), start + self._max_len) + 1):
+                if word[start:end] in self._entries:
+                    found.add(word[start:end])
+        return found
+
+    def count(self, words: List[str], kinds: Iterable[str] = MATCH_KINDS):
+        """Returns a Counter of matching words per entry for each of the requested match kinds."""
+        counts = {kind: Counter() for kind in MATCH_KINDS}
+        kinds = set(kinds)
+        match_prefixes = bool(kinds & {"prefix", "proper_prefix"})
+        match_suffixes = bool(kinds & {"suffix", "proper_suffix"})
+        for word in words:
+            if match_prefixes:
+                for entry in self._prefixes(word):
+                    counts["prefix"][entry] += 1
+                    counts["proper_prefix"][entry] += entry != word
+            if match_suffixes:
+                for entry in self._suffixes(word):
+                    counts["suffix"][entry] += 1
+                    counts["proper_suffix"][entry] += entry != word
+            if "infix" in kinds:
+                counts["infix"].update(self._infixes(word))
+        return {kind: counts[kind] for kind in kinds}
+
+    def vector(self, counts: Counter):
+        # one value per lexicon entry, in lexicon order and including duplicated entries
+        return [counts[entry] for entry in self.lexicon]
@@ -1,16 +1,17 @@
 from typing import Tuple, List
-from .utils import nlp_stanza
+from .annotation import DocumentAnnotation
 
 
-def extract_sent_general_features(text: str, paragraph: List[List[Tuple[str, str, str, str]]], feature_names=None):
-    doc = nlp_stanza(text)
+def extract_sent_general_features(text: str, paragraph: List[List[Tuple[str, str, str, str]]], feature_names=None,
+                                  annotation: DocumentAnnotation = None):
+    doc = annotation if annotation is not None else DocumentAnnotation(text)
     features = []
     if feature_names is None:
         for feature in sent_general_features.values():
             features.extend(feature(doc, paragraph))
     else:
         for feature in feature_names:
-            features.extend(sent_general_features[feature](text, paragraph))
+            features.extend(sent_general_features[feature](doc, paragraph))
     return features
 
 
@@ -50,13 +51,7 @@ def min_sent_len_by_words(doc, paragraph: List[List[Tuple[str, str, str, str]]])
 
 def long_sent_by_symbols_occurrence(doc, paragraph: List[List[Tuple[str, str, str, str]]]):
     # finding average sentence length by symbols of text
-    txt = []
-    for sentence in doc.sentences:
-        txt_sent = []
-        for word in sentence.words:
-            txt_sent.append((word.text, word.lemma, word.pos, word.deprel))
-        txt.append(txt_sent)
-    avg_sent_len_of_text = avg_sent_len_by_symbols(doc, txt)[0]
+    avg_sent_len_of_text = doc.avg_sent_len_by_symbols
     # finding short sentences frequency in paragraph
     sent_lens_by_symb = [_len_by_symbols(sent) for sent in paragraph]
     occurrence = any(sent_len >= avg_sent_len_of_text for sent_len in sent_lens_by_symb)
@@ -65,13 +60,7 @@ def long_sent_by_symbols_occurrence(doc, paragraph: List[List[Tuple[str, str, st
 
 def long_sent_by_words_occurrence(doc, paragraph: List[List[Tuple[str, str, str, str]]]):
     # finding average sentence length by symbols of text
-    txt = []
-    for sentence in doc.sentences:
-        txt_sent = []
-        for word in sentence.words:
-            txt_sent.append((word.text, word.lemma, word.pos, word.deprel))
-        txt.append(txt_sent)
-    avg_sent_len_of_text = avg_sent_len_by_words(doc, txt)[0]
+    avg_sent_len_of_text = doc.avg_sent_len_by_words
     # finding short sentences frequency in paragraph
     sent_lens_by_words = [len(sent) for sent in paragraph]
     occurrence = any(sent_len > avg_sent_len_of_text for sent_len in sent_lens_by_words)
@@ -80,13 +69,7 @@ def long_sent_by_words_occurrence(doc, paragraph: List[List[Tuple[str, str, str,
 
 def long_sents_by_symbols_freq(doc, paragraph: List[List[Tuple[str, str, str, str]]]):
     # finding average sentence length by words of text
-    txt = []
-    for sentence in doc.sentences:
-        txt_sent = []
-        for word in sentence.words:
-            txt_sent.append((word.text, word.lemma, word.pos, word.deprel))
-        txt.append(txt_sent)
-    avg_sent_len = avg_sent_len_by_symbols(doc, txt)[0]
+    avg_sent_len = doc.avg_sent_len_by_symbols
     # finding short sentences frequency in paragraph
     sent_lens_by_symb = [_len_by_symbols(sent) for sent in paragraph]
     matches_count = sum(sent_len > avg_sent_len for sent_len in sent_lens_by_symb)
@@ -95,13 +78,7 @@ def long_sents_by_symbols_freq(doc, paragraph: List[List[Tuple[str, str, str, st
 
 def long_sents_by_words_freq(doc, paragraph: List[List[Tuple[str, str, str, str]]]):
     # finding average sentence length by words of text
-    txt = []
-    for sentence in doc.sentences:
-        txt_sent = []
-        for word in sentence.words:
-            txt_sent.append((word.text, word.lemma, word.pos, word.deprel))
-        txt.append(txt_sent)
-    avg_sent_len = avg_sent_len_by_words(doc, txt)[0]
+    avg_sent_len = doc.avg_sent_len_by_words
     # finding short sentences frequency in paragraph
     sent_lens_by_words = [len(sent) for sent in paragraph]
     matches_count = sum(sent_len > avg_sent_len for sent_len in sent_lens_by_words)
@@ -110,13 +87,7 @@ def long_sents_by_words_freq(doc, paragraph: List[List[Tuple[str, str, str, str]
 
 def short_sent_by_symbols_occurrence(doc, paragraph: List[List[Tuple[str, str, str, str]]]):
     # finding average sentence length by symbols of text
-    txt = []
-    for sentence in doc.sentences:
-        txt_sent = []
-        for word in sentence.words:
-            txt_sent.append((word.text, word.lemma, word.pos, word.deprel))
-        txt.append(txt_sent)
-    avg_sent_len_of_text = avg_sent_len_by_symbols(doc, txt)[0]
+    avg_sent_len_of_text = doc.avg_sent_len_by_symbols
     # finding short sentences frequency in paragraph
     sent_lens_by_symb = [_len_by_symbols(sent) for sent in paragraph]
     occurrence = any(sent_len <= avg_sent_len_of_text for sent_len in sent_lens_by_symb)
@@ -125,13 +96,7 @@ def short_sent_by_symbols_occurrence(doc, paragraph: List[List[Tuple[str, str, s
 
 def short_sent_by_words_occurrence(doc, paragraph: List[List[Tuple[str, str, str, str]]]):
     # finding average sentence length by symbols of text
-    txt = []
-    for sentence in doc.sentences:
-        txt_sent = []
-        for word in sentence.words:
-            txt_sent.append((word.text, word.lemma, word.pos, word.deprel))
-        txt.append(txt_sent)
-    avg_sent_len_of_text = avg_sent_len_by_words(doc, txt)[0]
+    avg_sent_len_of_text = doc.avg_sent_len_by_words
     # finding short sentences frequency in paragraph
     sent_lens_by_words = [len(sent) for sent in paragraph]
     occurrence = any(sent_len <= avg_sent_len_of_text for sent_len in sent_lens_by_words)
@@ -140,13 +105,7 @@ def short_sent_by_words_occurrence(doc, paragraph: List[List[Tuple[str, str, str
 
 def short_sents_by_symbols_freq(doc, paragraph: List[List[Tuple[str, str, str, str]]]):
     # finding average sentence length by words of text
-    txt = []
-    for sentence in doc.sentences:
-        txt_sent = []
-        for word in sentence.words:
-            txt_sent.append((word.text, word.lemma, word.pos, word.deprel))
-        txt.append(txt_sent)
-    avg_sent_len = avg_sent_len_by_symbols(doc, txt)[0]
+    avg_sent_len = doc.avg_sent_len_by_symbols
     # finding short sentences frequency in paragraph
     sent_lens_by_symb = [_len_by_symbols(sent) for sent in paragraph]
     matches_count = sum(sent_len <= avg_sent_len for sent_len in sent_lens_by_symb)
@@ -155,13 +114,7 @@ def short_sents_by_symbols_freq(doc, paragraph: List[List[Tuple[str, str, str, s
 
 def short_sents_by_words_freq(doc, paragraph: List[List[Tuple[str, str, str, str]]]):
     # finding average sentence length by words of text
-    txt = []
-    for sentence in doc.sentences:
-        txt_sent = []
-        for word in sentence.words:
-            txt_sent.append((word.text, word.lemma, word.pos, word.deprel))
-        txt.append(txt_sent)
-    avg_sent_len = avg_sent_len_by_words(doc, txt)[0]
+    avg_sent_len = doc.avg_sent_len_by_words
     # finding short sentences frequency in paragraph
     sent_lens_by_words = [len(sent) for sent in paragraph]
     matches_count = sum(sent_len > avg_sent_len for sent_len in sent_lens_by_words)
@@ -1,71 +1,114 @@
 from typing import Tuple, List
 import os
+from collections import Counter
+import numpy as np
 from nltk import ngrams
 from .utils import EXTERNAL_DIR
 
+# pos n-gram vocabularies by n and, for each n-gram, its positions in the vocabulary
+pos_vocabularies = {}
+pos_vocabulary_indices = {}
+
+
+def _vocabulary_index(vocabulary: list):
+    index = {}
+    for i, ngram in enumerate(vocabulary):
+        index.setdefault(ngram, []).append(i)
+    return index
+
+
 try:
     with open(os.path.join(EXTERNAL_DIR, "pos_labels.txt"), 'r', encoding="utf8") as fin:
         pos_unigrams = [pos for pos in fin.read().split()]
+    pos_vocabularies[1] = pos_unigrams
+    pos_vocabulary_indices[1] = _vocabulary_index(pos_unigrams)
 except Exception as e:
     print("Failed to read pos_labels.txt. Skipping pos label features.")
 
 try:
     with open(os.path.join(EXTERNAL_DIR, "common_pos_bigrams.txt"), 'r', encoding="utf8") as fin:
         possible_pos_bigrams = [tuple(poses.split()) for poses in fin.read().split("\n")]
+    pos_vocabularies[2] = possible_pos_bigrams
+    pos_vocabulary_indices[2] = _vocabulary_index(possible_pos_bigrams)
 except Exception as e:
     print("Failed to read common_pos_bigrams.txt. Skipping pos bigram features.")
 
 try:
     with open(os.path.join(EXTERNAL_DIR, "common_pos_trigrams.txt"), 'r', encoding="utf8") as fin:
         possible_pos_trigrams = [tuple(poses.split()) for poses in fin.read().split("\n")]
+    pos_vocabularies[3] = possible_pos_trigrams
+    pos_vocabulary_indices[3] = _vocabulary_index(possible_pos_trigrams)
 except Exception as e:
     print("Failed to read common_pos_trigrams.txt. Skipping pos trigram features.")
 
 
 def extract_sent_morphological_features(text: str, paragraph: List[List[Tuple[str, str, str, str]]], feature_names=None):
-    features = []
     paragraph_pos_unigrams = [item[2] for sentence in paragraph for item in sentence]
-    if feature_names is None:
-        for feature in sent_morphological_features.values():
-            features.extend(feature(text, paragraph_pos_unigrams))
-    else:
-        for feature in feature_names:
-            features.extend(sent_morphological_features[feature](text, paragraph_pos_unigrams))
+    feature_names = list(sent_morphological_features) if feature_names is None else feature_names
+    # n-grams are counted once and every feature block is filled into its slice of one row
+    counts = count_pos_ngrams(paragraph_pos_unigrams)
+    sizes = [len(pos_vocabularies[feature_ngram_orders[feature]]) for feature in feature_names]
+    features = np.empty(sum(sizes))
+    start = 0
+    for feature, size in zip(feature_names, sizes):
+        sent_morphological_features[feature](text, paragraph_pos_unigrams, counts, features[start:start + size])
+        start += size
     return features
 
 
-def pos_unigram_freq(text: str, paragraph_pos_unigrams: list):
-    feature = [float(paragraph_pos_unigrams.count(pos) / len(pos_unigrams))
-               for pos in pos_unigrams]
-    return feature
+def count_pos_ngrams(paragraph_pos_unigrams: list):
+    return {1: Counter(paragraph_pos_unigrams),
+            2: Counter(ngrams(paragraph_pos_unigrams, 2)),
+            3: Counter(ngrams(paragraph_pos_unigrams, 3))}
+
+
+def _pos_ngram_counts(paragraph_pos_unigrams: list, n: int, counts=None, out=None):
+    # fills `out` with the paragraph count of every vocabulary n-gram
+    if counts is None:
+        counts = count_pos_ngrams(paragraph_pos_unigrams)
+    if out is None:
+        out = np.empty(len(pos_vocabularies[n]))
+    out[:] = 0.0
+    vocabulary_index = pos_vocabulary_indices[n]
+    for ngram, count in counts[n].items():
+        for i in vocabulary_index.get(ngram, ()):
+            out[i] = count
+    return out
+
+
+def _pos_ngram_freq(paragraph_pos_unigrams: list, n: int, normalizer: int, counts=None, out=None):
+    out = _pos_ngram_counts(paragraph_pos_unigrams, n, counts, out)
+    if normalizer != 0:
+        out /= normalizer
+    else:
+        out[:] = 0.0
+    return out
+
+
+def _pos_ngram_occurrence(paragraph_pos_unigrams: list, n: int, counts=None, out=None):
+    out = _pos_ngram_counts(paragraph_pos_unigrams, n, counts, out)
+    out[:] = out > 0
+    return out
 
 
-def pos_bigram_freq(text: str, paragraph_pos_unigrams: list):
-    paragraph_pos_bigrams = list(ngrams(paragraph_pos_unigrams, 2))
-    feature = [float(paragraph_pos_bigrams.count(pos) / (len(possible_pos_bigrams) - 1))
-               if len(possible_pos_bigrams)-1 != 0 else [0.0]
-               for pos in possible_pos_bigrams]
-    return feature
+def pos_unigram_freq(text: str, paragraph_pos_unigrams: list, counts=None, out=None):
+    return _pos_ngram_freq(paragraph_pos_unigrams, 1, len(pos_unigrams), counts, out)
 
 
-def pos_trigram_freq(text: str, paragraph_pos_unigrams: list):
-    paragraph_pos_trigrams = list(ngrams(paragraph_pos_unigrams, 3))
-    feature = [float(paragraph_pos_trigrams.count(pos) / (len(possible_pos_trigrams) - 2))
-               if len(possible_pos_trigrams)-2 != 0 else [0.0]
-               for pos in possible_pos_trigrams]
-    return feature
+def pos_bigram_freq(text: str, paragraph_pos_unigrams: list, counts=None, out=None):
+    return _pos_ngram_freq(paragraph_pos_unigrams, 2, len(possible_pos_bigrams) - 1, counts, out)
 
 
-def pos_bigram_occurrence(text: str, paragraph_pos_unigrams: list):
-    paragraph_pos_bigrams = list(ngrams(paragraph_pos_unigrams, 2))
-    feature = [(float(pos in paragraph_pos_bigrams))for pos in possible_pos_bigrams]
-    return feature
+def pos_trigram_freq(text: str, paragraph_pos_unigrams: list, counts=None, out=None):
+    return _pos_ngram_freq(paragraph_pos_unigrams, 3, len(possible_pos_trigrams) - 2, counts, out)
 
 
-def pos_trigram_occurrence(text: str, paragraph_pos_unigrams: list):
-    paragraph_pos_trigrams = list(ngrams(paragraph_pos_unigrams, 3))
-    feature = [(float(pos in paragraph_pos_trigrams))for pos in possible_pos_trigrams]
-    return feature
+def pos_bigram_occurrence(text: str, paragraph_pos_unigrams: list, counts=None, out=None):
+    return _pos_ngram_occurrence(paragraph_pos_unigrams, 2, counts, out)
+
+
+def pos_trigram_occurrence(text: str, paragraph_pos_unigrams: list, counts=None, out=None):
+    return _pos_ngram_occurrence(paragraph_pos_unigrams, 3, counts, out)
 
 
 sent_morphological_features = {
@@ -75,3 +118,11 @@ sent_morphological_features = {
     "pos_bigram_frequency": pos_bigram_freq,
     "pos_trigram_frequency": pos_trigram_freq
 }
+
+feature_ngram_orders = {
+    "pos_bigram_occurrence": 2,
+    "pos_trigram_occurrence": 3,
+    "pos_unigram_frequency": 1,
+    "pos_bigram_frequency": 2,
+    "pos_trigram_frequency": 3
+}
@@ -1,12 +1,14 @@
 import os
 import re
-import stanza
-import spacy_udpipe
+from nlp_pipelines import LazyStanza, LazyUDPipe
 
 
 EXTERNAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'external_data')
-nlp_udpipe = spacy_udpipe.load(lang="hy")
-nlp_stanza = stanza.Pipeline(use_gpu=False, lang='hy',  processors='tokenize, mwt, pos, lemma, depparse')
+STANZA_LANG = 'hy'
+STANZA_PROCESSORS = 'tokenize, mwt, pos, lemma, depparse'
+STANZA_USE_GPU = False
+nlp_udpipe = LazyUDPipe(lang="hy")
+nlp_stanza = LazyStanza(lang=STANZA_LANG, processors=STANZA_PROCESSORS, use_gpu=STANZA_USE_GPU)
 
 
 def lemmatizer(text: str):
@@ -2,7 +2,8 @@ from typing import Tuple, List
 from collections import defaultdict, Counter
 import re
 import os
-from .utils import EXTERNAL_DIR, nlp_stanza
+from .utils import EXTERNAL_DIR
+from .annotation import DocumentAnnotation
 
 dict_of_freqs = {}
 try:
@@ -30,8 +31,10 @@ def _get_list_of_uncommon_words():
 list_of_uncommon_words = _get_list_of_uncommon_words()
 
 
-def extract_word_general_features(text: str, paragraph: List[List[Tuple[str, str, str, str]]], feature_names=None):
-    avg_word_len_of_text = _get_average_word_len(text)
+def extract_word_general_features(text: str, paragraph: List[List[Tuple[str, str, str, str]]], feature_names=None,
+                                  annotation: DocumentAnnotation = None):
+    doc = annotation if annotation is not None else DocumentAnnotation(text)
+    avg_word_len_of_text = doc.avg_word_len
     features = []
     if feature_names is None:
         for feature in word_general_features.values():
@@ -42,18 +45,6 @@ def extract_word_general_features(text: str, paragraph: List[List[Tuple[str, str
     return features
 
 
-def _get_average_word_len(text: str):
-    # finding average word length by symbols of text
-    doc = nlp_stanza(text)
-    words_count = 0
-    all_words_len = 0
-    for sentence in doc.sentences:
-        for word in sentence.words:
-            words_count += 1
-            all_words_len += len(word.text)
-    return all_words_len / words_count
-
-
 def long_word_occurrence(avg_word_len_of_text, paragraph: List[List[Tuple[str, str, str, str]]]):
     paragraph_word_lens = [len(item[0]) for sent in paragraph for item in sent]
     occurrence = any(word_len > avg_word_len_of_text for word_len in paragraph_word_lens)
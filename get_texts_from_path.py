@@ -2,6 +2,7 @@ import os
 import json
 import numpy as np
 import re
+from vector_store import VectorStore, is_vector_store
 
 
 def read_json(json_doc):
@@ -10,98 +11,50 @@ def read_json(json_doc):
     return doc
 
 
-def get_docs_batch(path, start, end):
-    docs = []
-    files = sorted(os.listdir(path))
-    batch = files[start:end]
-    for json_doc in batch:
-        extracted_doc = read_json(os.path.join(path, json_doc))
-        sources = np.array(extracted_doc['paragraph_source_docs'])
-        indices = np.where(sources[:-1] != sources[1:])[0]
-        indices = indices + np.ones(len(indices), dtype=int)
-        breaches = []
-        changes = False
-        if len(indices):
-            text = []
-            changes = True
-            indices = np.insert(indices, 0, 0)
-            indices = np.insert(indices, len(indices), len(sources))
-            length = 0
-            for i in range(len(indices) - 1):
-                if i == len(indices) - 2:
-                    text.append('\n'.join(extracted_doc['paragraphs'][indices[i]:indices[i + 1]]))
-                else:
-                    text.append('\n'.join([*extracted_doc['paragraphs'][indices[i]:indices[i + 1]], '']))
-                    length += len(text[-1])
-                    breaches.append(length)
-            text = ''.join(text)
+def get_text_and_truth(extracted_doc):
+    paragraphs = extracted_doc['paragraphs']
+    sources = np.array(extracted_doc['paragraph_source_docs'])
+    indices = np.where(sources[:-1] != sources[1:])[0] + 1
+    # every paragraph but the last is followed by '\n', a breach is the offset of the first paragraph of a new source
+    paragraph_ends = np.cumsum([len(paragraph) + 1 for paragraph in paragraphs], dtype=int)
+    breaches = [int(paragraph_ends[i - 1]) for i in indices]
+    text = '\n'.join(paragraphs)
+    return text, {"style_change": bool(len(indices)), "style_breaches": breaches}
+
+
+def iter_docs(path, vecpath=None, shard_id=0, num_shards=1, offset=0, limit=None):
+    """Lazily yields the non-empty documents of a dataset folder in file name order.
+
+    Yields (file name, text, truth) tuples or, when `vecpath` is given, (name, text, vector, truth)
+    tuples with the vectors saved for that dataset, either as a vector store or as per-document
+    JSON files. Files are split into `num_shards` interleaved
+    shards, `offset` and `limit` then select a range of the files of shard `shard_id`.
+    """
+    files = sorted(os.listdir(path))[shard_id::num_shards]
+    files = files[offset:] if limit is None else files[offset:offset + limit]
+    vector_store = VectorStore(vecpath) if vecpath is not None and is_vector_store(vecpath) else None
+    for json_doc in files:
+        text, truth = get_text_and_truth(read_json(os.path.join(path, json_doc)))
+        if len(text) == 0:
+            continue
+        if vecpath is None:
+            yield json_doc, text, truth
         else:
-            text = '\n'.join(extracted_doc['paragraphs'])
-        if len(text) > 0:
-            docs.append((json_doc, text, {"style_change": changes, "style_breaches": breaches}))
-    return docs
+            fn = re.sub('json$', '', json_doc)
+            if vector_store is not None:
+                extracted_vec = vector_store.get(os.path.splitext(json_doc)[0])
+            else:
+                extracted_vec = read_json(os.path.join(vecpath, fn + 'truth'))["vector"]
+            yield fn, text, extracted_vec, truth
+
+
+def get_docs_batch(path, start, end):
+    return list(iter_docs(path, offset=start, limit=max(end - start, 0)))
 
 
 def get_docs(path):
-    docs = []
-    files = sorted(os.listdir(path))
-    for json_doc in files:
-        extracted_doc = read_json(os.path.join(path, json_doc))
-        sources = np.array(extracted_doc['paragraph_source_docs'])
-        indices = np.where(sources[:-1] != sources[1:])[0]
-        indices = indices + np.ones(len(indices), dtype=int)
-        breaches = []
-        changes = False
-        if len(indices):
-            text = []
-            changes = True
-            indices = np.insert(indices, 0, 0)
-            indices = np.insert(indices, len(indices), len(sources))
-            length = 0
-            for i in range(len(indices) - 1):
-                if i == len(indices) - 2:
-                    text.append('\n'.join(extracted_doc['paragraphs'][indices[i]:indices[i + 1]]))
-                else:
-                    text.append('\n'.join([*extracted_doc['paragraphs'][indices[i]:indices[i + 1]], '']))
-                    length += len(text[-1])
-                    breaches.append(length)
-            text = ''.join(text)
-        else:
-            text = '\n'.join(extracted_doc['paragraphs'])
-        if len(text) > 0:
-            docs.append((json_doc, text, {"style_change": changes, "style_breaches": breaches}))
-    return docs
+    return list(iter_docs(path))
 
 
 def get_vecs(path, vecpath):
-    doc_vecs = []
-    files = sorted(os.listdir(path))
-    filenames = [re.sub('json$', '', file)for file in files]
-    for fn in filenames:
-        extracted_vec = read_json(os.path.join(vecpath, fn + 'truth'))["vector"]
-        extracted_doc = read_json(os.path.join(path, fn + 'json'))
-        sources = np.array(extracted_doc['paragraph_source_docs'])
-        indices = np.where(sources[:-1] != sources[1:])[0]
-        indices = indices + np.ones(len(indices), dtype=int)
-        breaches = []
-        changes = False
-        if len(indices):
-            text = []
-            changes = True
-            indices = np.insert(indices, 0, 0)
-            indices = np.insert(indices, len(indices), len(sources))
-            length = 0
-            for i in range(len(indices) - 1):
-                if i == len(indices) - 2:
-                    text.append('\n'.join(extracted_doc['paragraphs'][indices[i]:indices[i + 1]]))
-                else:
-                    text.append('\n'.join([*extracted_doc['paragraphs'][indices[i]:indices[i + 1]], '']))
-                    length += len(text[-1])
-                    breaches.append(length)
-            text = ''.join(text)
-        else:
-            text = '\n'.join(extracted_doc['paragraphs'])
-        if len(text) > 0:
-            doc_vecs.append((fn, text, extracted_vec, {"style_change": changes, "style_breaches": breaches}))
-    return doc_vecs
-
+    return list(iter_docs(path, vecpath=vecpath))
@@ -1,62 +1,106 @@
-from typing import List, Tuple
+from typing import Callable, Iterable, List, Tuple
 from models.karas_et_al.main import make_prediction
 from models.utils import text_segmentation
-from feature_extraction.computation import compute_feature_vectors
-import time
+from models.utils.executor import map_documents, init_nlp_worker
+from feature_extraction.computation import compute_feature_vectors, needs_document_annotation
+from feature_extraction.annotation import iter_annotated_documents
 import datetime
+from profiling import profiler
 
 
 class KarasModel(object):
 
-    def __init__(self, hyperparams: List, features: List[str]):
-        self.features = features
+    def __init__(self, hyperparams: List, features: List[str], annotation_batch: dict = None, execution: dict = None):
+        self.features = list(features)
         self.hyperparams = hyperparams
+        self.annotation_batch = annotation_batch
+        self.execution = execution or {}
 
     def train(self, train_set: List[Tuple[str, dict]], dev_set: List[Tuple[str, dict]]):
         pass
 
-    def test(self, test_set: List[Tuple[str, dict]], use_vectors):
+    def test(self, test_set: List[Tuple[str, dict]], use_vectors, on_result: Callable = None):
         if use_vectors:
             docs_vectors = [(t, v) for t, v, d in test_set]
-            pred_results = self.analyse_documents(docs_vectors, use_vectors)
+            pred_results = self.analyse_documents(docs_vectors, use_vectors, on_result)
         else:
             docs = [x for x, y in test_set]
-            pred_results = self.analyse_documents(docs, use_vectors)
+            pred_results = self.analyse_documents(docs, use_vectors, on_result)
         dict = pred_results[0]
         vectors = pred_results[1]
         return dict, vectors
 
-    def analyse_documents(self, documents: List[str], use_vectors):
+    def iter_test(self, test_set: Iterable[Tuple], use_vectors):
+        """Yields the (prediction, feature vectors) of each document of a lazily read test set as soon as it is done."""
+        if use_vectors:
+            return self.iter_analyse(((t, v) for t, v, d in test_set), use_vectors)
+        return self.iter_analyse((x for x, y in test_set), use_vectors)
+
+    def analyse_documents(self, documents: List[str], use_vectors, on_result: Callable = None):
+        """Returns the predictions and feature vectors of the documents.
+
+        `on_result(index, prediction, feature_vectors)` is called as soon as a document is done.
+        """
         results = []
-        i = 1
-        l = len(documents)
+        docs_vectors = documents if use_vectors else []
+        for i, (result, feature_vectors) in enumerate(self.iter_analyse(documents, use_vectors)):
+            results.append(result)
+            if not use_vectors:
+                docs_vectors.append(feature_vectors)
+            if on_result is not None:
+                on_result(i, result, feature_vectors)
+        return results, docs_vectors
+
+    def iter_analyse(self, documents: Iterable, use_vectors):
+        """Yields the (prediction, feature vectors) of the documents in input order, only reading ahead
+        as many documents as the workers are busy with."""
         if use_vectors:
-            docs_vectors = documents
-            for text, paragraph_vectors in docs_vectors:
-                print("working on the", i, "/", l, datetime.datetime.now().time())
-                start_time = time.time()
-                paragraphs = text_segmentation.get_paragraphs_of(text)
-                results.append(self._analyse(paragraph_vectors, paragraphs))
-                print("computation time:", time.time() - start_time)
-                i += 1
+            analysed = map_documents(self._analyse_vectors_chunk, documents, **self.execution)
         else:
-            docs_vectors = []
-            for document in documents:
-                print("working on the", i, "/", l, datetime.datetime.now().time())
-                start_time = time.time()
+            analysed = map_documents(self._analyse_documents_chunk, documents, initializer=init_nlp_worker,
+                                     **self.execution)
+        for i, (result, feature_vectors, record) in enumerate(analysed, 1):
+            print("finished the", i, datetime.datetime.now().time())
+            print("computation time:", record["seconds"])
+            profiler.add_document(record)
+            yield result, feature_vectors
+
+    def _analyse_vectors_chunk(self, docs_vectors: List[Tuple[str, List[List[float]]]]):
+        analysed = []
+        for text, paragraph_vectors in docs_vectors:
+            with profiler.document(text) as record:
+                paragraphs = text_segmentation.get_paragraphs_of(text)
+                result = self._analyse(paragraph_vectors, paragraphs)
+            analysed.append((result, None, record))
+        return analysed
+
+    def _analyse_documents_chunk(self, documents: List[str]):
+        analysed = []
+        annotations = iter(self._annotate(documents))
+        for document in documents:
+            # a batched annotation counts for the document that starts the batch
+            with profiler.document(document) as record:
+                annotation = next(annotations)
                 paragraphs = text_segmentation.get_paragraphs_of(document)
                 if self.features:
-                    feature_vectors = compute_feature_vectors(document, paragraphs, self.features)
+                    feature_vectors = compute_feature_vectors(document, paragraphs, self.features, annotation)
                 else:
                     feature_vectors = []
-                docs_vectors.append(feature_vectors)
-                results.append(self._analyse(feature_vectors, paragraphs))
-                print("computation time:", time.time()-start_time)
-                i += 1
-        return results, docs_vectors
+                result = self._analyse(feature_vectors, paragraphs)
+            analysed.append((result, feature_vectors, record))
+        return analysed
+
+    def _annotate(self, documents: List[str]):
+        if not self.features or self.annotation_batch is None:
+            # every document gets annotated lazily by compute_feature_vectors
+            return [None] * len(documents)
+        return iter_annotated_documents(((document, text_segmentation.get_paragraphs_of(document))
+                                         for document in documents),
+                                        with_text=needs_document_annotation(self.features), **self.annotation_batch)
 
     def _analyse(self, feature_vectors: List[List[float]], paragraphs: List[str]):
-        predicted = make_prediction(feature_vectors, paragraphs, self.hyperparams)
+        with profiler.stage("wilcoxon"):
+            predicted = make_prediction(feature_vectors, paragraphs, self.hyperparams)
         return {
             "style_change": predicted["style_change"],
             "style_breaches": predicted["style_breaches"]
@@ -1,31 +1,46 @@
 import os
 from models.karas_et_al import external_data
 from feature_extraction.utils import word_tokenize
+from feature_extraction.annotation import annotate_batch
 karas_external_data_path = os.path.dirname(external_data.__file__)
 
 
 def get_punct_list():
-    return open(karas_external_data_path + '/' + 'puncts.txt', 'r', encoding='utf8').read().splitlines()
+    with open(karas_external_data_path + '/' + 'puncts.txt', 'r', encoding='utf8') as fin:
+        return fin.read().splitlines()
 
 
 def get_stopwords_list():
-    return open(karas_external_data_path + '/' + 'stopwords.txt', 'r', encoding='utf-8-sig').read().splitlines()
+    with open(karas_external_data_path + '/' + 'stopwords.txt', 'r', encoding='utf-8-sig') as fin:
+        return fin.read().splitlines()
+
+
+PUNCT_SET = set(get_punct_list())
+STOPWORD_SET = set(get_stopwords_list())
 
 
 def punct_tokenize(text: str):
-    punct_list = get_punct_list()
-    punct_tokens = []
-    for item in text:
-        if item in punct_list:
-            punct_tokens.append(item)
-    return punct_tokens
+    return [item for item in text if item in PUNCT_SET]
 
 
 def stopword_tokenize(text: str):
-    stopwords_list = get_stopwords_list()
-    word_tokens = word_tokenize(text)
-    stopword_tokens = []
-    for item in word_tokens:
-        if item in stopwords_list:
-            stopword_tokens.append(item)
-    return stopword_tokens
+    return [item for item in word_tokenize(text) if item in STOPWORD_SET]
+
+
+def tokenize_paragraphs(paragraphs: list):
+    """Returns the word, punctuation, POS, stopword and word 3-gram streams of every paragraph.
+
+    udpipe and stanza run once per paragraph, on the lowercased text the tf-idf vectorizers
+    used to pass to their tokenizers.
+    """
+    texts = [paragraph.lower() for paragraph in paragraphs]
+    words = [word_tokenize(text) for text in texts]
+    poses = [[token[2] for sentence in tokens for token in sentence] for tokens in annotate_batch(texts)]
+    return {
+        "word": words,
+        "punct": [punct_tokenize(text) for text in texts],
+        "pos": poses,
+        "stopword": [[word for word in paragraph_words if word in STOPWORD_SET] for paragraph_words in words],
+        "3-gram": [[" ".join(paragraph_words[i:i + 3]) for i in range(len(paragraph_words) - 2)]
+                   for paragraph_words in words]
+    }
@@ -1,25 +1,19 @@
 import operator
 import scipy.sparse as sp
-import pandas as pd
-from scipy.stats import wilcoxon
+import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
-from feature_extraction.utils import word_tokenize, pos_tagger
-from models.karas_et_al.classic_features import punct_tokenize, stopword_tokenize
+from models.karas_et_al.classic_features import tokenize_paragraphs
 from models.utils.text_segmentation import get_start_indices
+from models.karas_et_al.wilcoxon import adjacent_wilcoxon
+from profiling import profiler
 
 
-def find_style_change_starts_by_wilcoxon(features_data_frame, hyperparams):
+def find_style_change_starts_by_wilcoxon(features, hyperparams):
     style_change_borders = [0]
-    num_of_paragraphs = features_data_frame.shape[0]
+    num_of_paragraphs = features.shape[0]
 
     # doing Wilcoxon sign-rank test
-    p_values = {}
-    for i in range(num_of_paragraphs - 1):
-        if features_data_frame.iloc[i].equals(features_data_frame.iloc[i + 1]) is False:
-            stat, p_value = wilcoxon(features_data_frame.iloc[i], features_data_frame.iloc[i + 1],
-                                     zero_method='pratt',
-                                     alternative='two-sided')
-            p_values[i + 1] = p_value
+    p_values = adjacent_wilcoxon(features)
     sorted_p_values = sorted(p_values.items(), key=operator.itemgetter(1))
 
     # used hyper parameters
@@ -41,38 +35,32 @@ def find_style_change_starts_by_wilcoxon(features_data_frame, hyperparams):
     return style_change_borders if len(style_change_borders) != 1 else []
 
 
+def pretokenized(tokens: list):
+    return tokens
+
+
 def get_classic_feature_vecs(paragraphs: list):
-    # 1.word tfidf
-    word_vectorizer = TfidfVectorizer(tokenizer=word_tokenize)
-    word_vectors = word_vectorizer.fit_transform(paragraphs)
-    # 2.punctation tfidf
-    punct_vectorizer = TfidfVectorizer(tokenizer=punct_tokenize)
-    punct_vectors = punct_vectorizer.fit_transform(paragraphs)
-    # 3.POS tfidf
-    pos_vectorizer = TfidfVectorizer(tokenizer=pos_tagger)
-    pos_vectors = pos_vectorizer.fit_transform(paragraphs)
-    # 4.stopwords tfidf
-    stopword_vectorizer = TfidfVectorizer(tokenizer=stopword_tokenize)
-    stopword_vectors = stopword_vectorizer.fit_transform(paragraphs)
-    # 5.3-grams tfidf
-    three_gram_vectorizer = TfidfVectorizer(tokenizer=word_tokenize, ngram_range=(3, 3))
-    three_gram_vectors = three_gram_vectorizer.fit_transform(paragraphs)
-    return [word_vectors, punct_vectors, pos_vectors, stopword_vectors, three_gram_vectors]
+    # 1.word 2.punctation 3.POS 4.stopwords 5.3-grams tfidf over token streams of a single annotation pass
+    token_streams = tokenize_paragraphs(paragraphs)
+    vectors = []
+    for name in ["word", "punct", "pos", "stopword", "3-gram"]:
+        vectorizer = TfidfVectorizer(analyzer=pretokenized)
+        vectors.append(vectorizer.fit_transform(token_streams[name]))
+    return vectors
 
 
 def make_prediction(feature_vectors, paragraphs, hyperparams):
     # style fingerprints by features
-    if not feature_vectors:
-        classic_features_vecs = get_classic_feature_vecs(paragraphs)
-        vectors = sp.hstack(classic_features_vecs, format='csr')
-        denselist = (vectors.todense()).tolist()
-        df = pd.DataFrame(data=denselist)
+    if len(feature_vectors) == 0:
+        with profiler.stage("classic_features"):
+            classic_features_vecs = get_classic_feature_vecs(paragraphs)
+        # tf-idf vectors stay sparse, the Wilcoxon tests only rank their nonzero differences
+        features = sp.hstack(classic_features_vecs, format='csr')
     else:
-        df = pd.DataFrame(data=feature_vectors)
+        features = np.asarray(feature_vectors)
 
     # borders by Wilcoxon test
-    style_change_borders = find_style_change_starts_by_wilcoxon(features_data_frame=df,
-                                                                hyperparams=hyperparams)
+    style_change_borders = find_style_change_starts_by_wilcoxon(features=features, hyperparams=hyperparams)
 
     # result format correction(found borders -> breaches)
     style_breaches = [] if not style_change_borders else get_start_indices(style_change_borders, paragraphs)
@@ -0,0 +1,75 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.stats import norm, wilcoxon
+
+# scipy only uses the normal approximation above this sample size, smaller pairs are passed to it
+MIN_ASYMPTOTIC_SIZE = 51
+
+
+def _pratt_p_values(rows: np.ndarray, values: np.ndarray, n_pairs: int, count: int):
+    """Two-sided Wilcoxon signed-rank p-values with Pratt's zero handling under the normal approximation.
+
+    `rows` and `values` are the row indices and values of the nonzero differences of `n_pairs`
+    samples of `count` differences each. Pratt ranks the zero differences first, so the nonzero
+    ones are ranked within their row and shifted past the zeros, ties get their average rank.
+    """
+    n_nonzero = np.bincount(rows, minlength=n_pairs)
+    n_zero = (count - n_nonzero).astype(float)
+    abs_values = np.abs(values)
+    order = np.lexsort((abs_values, rows))
+    rows, values, abs_values = rows[order], values[order], abs_values[order]
+
+    # groups of equal absolute differences within a row
+    starts = np.ones(len(rows), dtype=bool)
+    starts[1:] = (rows[1:] != rows[:-1]) | (abs_values[1:] != abs_values[:-1])
+    group = np.cumsum(starts) - 1
+    group_start = np.flatnonzero(starts)
+    group_size = np.diff(np.append(group_start, len(rows))).astype(float)
+    group_row = rows[group_start]
+    row_start = np.cumsum(n_nonzero) - n_nonzero
+    group_rank = group_start - row_start[group_row] + 1 + (group_size - 1) / 2 + n_zero[group_row]
+    ranks = group_rank[group]
+
+    r_plus = np.bincount(rows, weights=ranks * (values > 0), minlength=n_pairs)
+    tie_correct = np.bincount(group_row, weights=group_size ** 3 - group_size, minlength=n_pairs)
+    # normal approximation adjusted for the ranked zeros, see Cureton (1967)
+    mn = (count * (count + 1.) - n_zero * (n_zero + 1.)) * 0.25
+    se = count * (count + 1.) * (2. * count + 1.) - n_zero * (n_zero + 1.) * (2. * n_zero + 1.)
+    se = np.sqrt((se - tie_correct / 2) / 24)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (r_plus - mn) / se
+    return 2 * norm.sf(np.abs(z))
+
+
+def adjacent_wilcoxon(features):
+    """Wilcoxon signed-rank tests of every pair of adjacent rows of a dense or sparse feature matrix.
+
+    Returns a dict from the index of the second row of a pair to the two-sided p-value, matching
+    scipy.stats.wilcoxon(zero_method='pratt'). Identical rows are not tested. Sparse matrices are
+    never densified, only the nonzero differences of each pair are ranked.
+    """
+    if features.shape[0] < 2:
+        return {}
+    if sp.issparse(features):
+        features = sp.csr_matrix(features)
+        diffs = sp.csr_matrix(features[:-1] - features[1:])
+        diffs.eliminate_zeros()
+        rows = np.repeat(np.arange(diffs.shape[0]), np.diff(diffs.indptr))
+        values = diffs.data
+    else:
+        features = np.asarray(features)
+        diffs = features[:-1] - features[1:]
+        rows, cols = np.nonzero(diffs)
+        values = diffs[rows, cols]
+    n_pairs, count = diffs.shape
+    different = np.bincount(rows, minlength=n_pairs) > 0
+    if count < MIN_ASYMPTOTIC_SIZE:
+        return {int(i) + 1: wilcoxon(_dense_row(features, i), _dense_row(features, i + 1),
+                                     zero_method='pratt', alternative='two-sided')[1]
+                for i in np.flatnonzero(different)}
+    p_values = _pratt_p_values(rows, values.astype(float), n_pairs, count)
+    return {int(i) + 1: float(p_values[i]) for i in np.flatnonzero(different)}
+
+
+def _dense_row(features, i: int):
+    return features[i].toarray().ravel() if sp.issparse(features) else features[i]
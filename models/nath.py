@@ -1,4 +1,4 @@
-from typing import List, Tuple
+from typing import Iterable, List, Tuple
 from .nath_et_al.src.algorithms.threshold_clustering.executor import execute_threshold_clustering
 import preprocess_NLP_pkg
 
@@ -13,6 +13,11 @@ class NathModel(object):
         pred_results = self.analyse_documents(docs)
         return pred_results
 
+    def iter_test(self, test_set: Iterable[Tuple[str, dict]]):
+        """Yields the prediction of each document of a lazily read test set as soon as it is done."""
+        for document, _ in test_set:
+            yield self._analyse(document)
+
     def analyse_documents(self, documents: List[str]):
         results = []
         for document in documents:
@@ -4,6 +4,7 @@
 import networkx as nx
 import numpy as np
 import copy
+from fractions import Fraction
 from statistics import mean, stdev
 
 
@@ -351,8 +352,155 @@ def filter_entries_containing_nodes(dist_array, nodes_set):
     return np.asarray(selected_dist_array)
 
 
+class _ArrayCluster(object):
+    """
+    A cluster of the array based engine: its nodes, the sorted positions of its edges and the exact sum of their
+    distances, so average distances equal statistics.mean over the edges of the corresponding cluster graph
+    """
+
+    def __init__(self, nodes, edges, total):
+        self.nodes = nodes
+        self.edges = edges
+        self.total = total
+
+    def avg_dist(self):
+        return float(self.total / len(self.edges))
+
+
 def cluster_graph(node_labels, dist_matrix, merge_cluster_threshold = 50, add_node_threshold = 50):
     """
+    Given a dist_matrix, create a list of cluster-graphs according to preset conditions. Makes the same decisions as
+    cluster_graph_networkx, but keeps clusters as node-to-cluster index arrays, edge position sets and exact distance
+    sums, and marks traversed entries in boolean masks, and only builds the networkx graphs of the final clusters.
+    :param node_labels: labels of nodes
+    :param dist_matrix: a two dimensional matrix representing the distance between windows.
+    :param merge_cluster_threshold: Two clusters can be merged together if the average distance of the new cluster is below
+    the merge_thresholds for either contributing clusters
+    :param add_node_threshold: A new node can be added to a cluster if the average distance of the new cluster is below
+             the add_node_threshold of the cluster
+    :return: a list of cluster graphs
+    """
+    labels = np.asarray(list(node_labels), dtype=float)
+    n_nodes = len(labels)
+    rows, cols = np.tril_indices(n_nodes, -1)  # the (i, j), i > j entries in the order of get_sorted_dist_array
+    dist = np.asarray(dist_matrix, dtype=float)[rows, cols]
+    order = dist.argsort()
+    node0, node1, weights = rows[order], cols[order], dist[order]
+    position = np.zeros((n_nodes, n_nodes), dtype=int)
+    position[node0, node1] = np.arange(len(weights))
+    position[node1, node0] = np.arange(len(weights))
+    fractions = [Fraction(weight) for weight in weights.tolist()]
+    # equal distances are adjacent in the sorted array, entries with the same distance share a group
+    weight_group = np.concatenate(([0], np.cumsum(weights[1:] != weights[:-1]))) if len(weights) else weights
+    # `entry in entries_already_traversed` on the traversed numpy array compares column-wise, an entry counts as
+    # traversed when its node0, its node1 or its distance appears in that column of any traversed entry
+    node0_traversed = np.zeros(n_nodes, dtype=bool)
+    node1_traversed = np.zeros(n_nodes, dtype=bool)
+    weight_traversed = np.zeros(len(weights) and weight_group[-1] + 1, dtype=bool)
+    cluster_of = np.full(n_nodes, -1)
+    clusters = {}
+    cg_list = []  # ids of clusters in the order of the networkx implementation
+
+    def new_cluster(nodes, edges, total):
+        cluster_id = len(clusters)
+        clusters[cluster_id] = _ArrayCluster(nodes, edges, total)
+        cluster_of[list(nodes)] = cluster_id
+        cg_list.append(cluster_id)
+        return cluster_id
+
+    def selected_entries(i, nodes):
+        # positions from i on of the entries between the given nodes
+        nodes = np.fromiter(nodes, dtype=int, count=len(nodes))
+        upper = np.triu_indices(len(nodes), 1)
+        positions = position[nodes[upper[0]], nodes[upper[1]]]
+        return positions[positions >= i]
+
+    def mark_traversed(selected):
+        traversed = node0_traversed[node0[selected]] | node1_traversed[node1[selected]] | \
+                    weight_traversed[weight_group[selected]]
+        added = selected[~traversed]
+        node0_traversed[node0[added]] = True
+        node1_traversed[node1[added]] = True
+        weight_traversed[weight_group[added]] = True
+
+    def union_total(total, edges, selected):
+        return total + sum((fractions[e] for e in selected.tolist() if e not in edges), Fraction(0))
+
+    for i in range(len(weights)):
+        a, b = int(node0[i]), int(node1[i])
+        if node0_traversed[a] or node1_traversed[b] or weight_traversed[weight_group[i]]:
+            continue
+        if cluster_of[a] == -1 and cluster_of[b] == -1:
+            new_cluster({a, b}, {i}, fractions[i])
+        elif cluster_of[a] == -1 or cluster_of[b] == -1:
+            cluster = clusters[max(cluster_of[a], cluster_of[b])]
+            node = a if cluster_of[a] == -1 else b
+            selected = selected_entries(i, cluster.nodes | {node})
+            mark_traversed(selected)
+            # check_and_add_node2
+            avg_dist = cluster.avg_dist()
+            cluster_size = len(cluster.nodes)
+            if cluster_size > 0 and avg_dist > 0:
+                threshold = add_node_threshold / (cluster_size * avg_dist)
+                new_total = union_total(cluster.total, cluster.edges, selected)
+                new_edges = cluster.edges.union(selected.tolist())
+                new_avg_dist = float(new_total / len(new_edges))
+                add = ((new_avg_dist - avg_dist) * 100) / avg_dist < threshold
+            else:
+                add = float(sum((fractions[e] for e in selected.tolist()), Fraction(0)) / len(selected)) < 0.3
+                if add:
+                    new_total = union_total(cluster.total, cluster.edges, selected)
+                    new_edges = cluster.edges.union(selected.tolist())
+            if add:
+                cluster.total = new_total
+                cluster.edges = new_edges
+                cluster.nodes.add(node)
+                cluster_of[node] = cluster_of[a] if cluster_of[a] != -1 else cluster_of[b]
+        else:
+            cluster_id0, cluster_id1 = int(cluster_of[a]), int(cluster_of[b])
+            cluster0, cluster1 = clusters[cluster_id0], clusters[cluster_id1]
+            nodes = cluster0.nodes | cluster1.nodes
+            selected = selected_entries(i, nodes)
+            mark_traversed(selected)
+            # check_cg_merge_criteria2
+            avg_dist_cg1, avg_dist_cg2 = cluster0.avg_dist(), cluster1.avg_dist()
+            size_cg1, size_cg2 = len(cluster0.nodes), len(cluster1.nodes)
+            # the edges of two clusters are disjoint, a cluster "merged" with itself counts once
+            same_cluster = cluster_id0 == cluster_id1
+            added = [e for e in selected.tolist() if e not in cluster0.edges and e not in cluster1.edges]
+            new_total = cluster0.total + (0 if same_cluster else cluster1.total) + \
+                sum((fractions[e] for e in added), Fraction(0))
+            edge_count = len(cluster0.edges) + (0 if same_cluster else len(cluster1.edges)) + len(added)
+            new_avg_dist = float(new_total / edge_count)
+            merge = False
+            if size_cg1 > 0 and size_cg2 > 0 and avg_dist_cg1 > 0 and avg_dist_cg2 > 0:
+                threshold_cg1 = merge_cluster_threshold / (size_cg1 * avg_dist_cg1)
+                threshold_cg2 = merge_cluster_threshold / (size_cg2 * avg_dist_cg2)
+                merge = ((new_avg_dist - avg_dist_cg1) * 100) / avg_dist_cg1 < threshold_cg1 and \
+                        ((new_avg_dist - avg_dist_cg2) * 100) / avg_dist_cg2 < threshold_cg2
+            elif size_cg1 > 0 and size_cg2 > 0 and avg_dist_cg1 == 0 and avg_dist_cg2 > 0:
+                threshold_cg2 = merge_cluster_threshold / (size_cg2 * avg_dist_cg2)
+                merge = new_avg_dist < 0.3 and ((new_avg_dist - avg_dist_cg2) * 100) / avg_dist_cg2 < threshold_cg2
+            elif size_cg1 > 0 and size_cg2 > 0 and avg_dist_cg1 > 0 and avg_dist_cg2 == 0:
+                threshold_cg1 = merge_cluster_threshold / (size_cg1 * avg_dist_cg1)
+                merge = new_avg_dist < 0.3 and ((new_avg_dist - avg_dist_cg1) * 100) / avg_dist_cg1 < threshold_cg1
+            if merge:
+                # a cluster "merged" with itself is replaced by a copy with the new edges at the end of the list
+                cg_list.remove(cluster_id0)
+                if cluster_id1 in cg_list:
+                    cg_list.remove(cluster_id1)
+                new_cluster(nodes, cluster0.edges | cluster1.edges | set(added), new_total)
+
+    cg_graphs = []
+    for cluster_id in cg_list:
+        edges = sorted(clusters[cluster_id].edges)
+        cg_graphs.append(create_cg(np.column_stack((labels[node0[edges]], labels[node1[edges]], weights[edges]))))
+    return cg_graphs
+
+
+def cluster_graph_networkx(node_labels, dist_matrix, merge_cluster_threshold = 50, add_node_threshold = 50):
+    """
+    Reference implementation of cluster_graph that keeps every cluster as a networkx graph.
     Given a dist_matrix, create a list of cluster-graphs according to preset conditions
     :param node_labels: labels of nodes
     :param dist_matrix: a two dimensional matrix representing the distance between windows.
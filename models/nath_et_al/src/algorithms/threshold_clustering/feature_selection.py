@@ -1,22 +1,39 @@
 import preprocess_NLP_pkg
+import nltk
 from math import log
 import re
 from .cluster_graph import *
 
 
+def window_feature_matrix(window_terms, selected_features):
+    """Returns the (windows x selected features) matrix of the relative frequencies of the selected features, equal to
+    select_feature_vector over the normalised frequency dict of each window, without building the dicts
+        Keyword arguments:
+            window_terms -- the list of terms (words or ngrams) of each window
+            selected_features -- the features against for which the feature vector must be generated
+    """
+    column_ids = {feature: i for i, feature in enumerate(dict.fromkeys(selected_features))}
+    n_windows, n_features = len(window_terms), len(column_ids)
+    lengths = np.fromiter((len(terms) for terms in window_terms), dtype=int, count=n_windows)
+    # one flat array of the column ids of all terms, the window of each term is given by the window offsets
+    columns = np.fromiter((column_ids.get(term, -1) for terms in window_terms for term in terms), dtype=int,
+                          count=lengths.sum())
+    windows = np.repeat(np.arange(n_windows), lengths)
+    selected = columns >= 0
+    counts = np.bincount(windows[selected] * n_features + columns[selected], minlength=n_windows * n_features)
+    counts = counts.reshape(n_windows, n_features).astype(float)
+    nonempty = lengths > 0
+    counts[nonempty] /= lengths[nonempty, None]
+    return counts
+
+
 def calculate_words_wfm(windows, selected_features):
     """Splits a text into windows of given size/ step size, converts windows into feature matrix against a given set of selected word features
         Keyword arguments:
             text -- the text to be converted into window feature matrix
             selected_features -- the features against for which the feature vector must be generated
     """
-    window_feature_matrix = []
-    for window in windows:
-        word_freq = preprocess_NLP_pkg.word_freq_count_normalised(window)
-        selected_word_freq = preprocess_NLP_pkg.select_feature_vector(word_freq, selected_features)
-        selected_word_vector = list(selected_word_freq.values())
-        window_feature_matrix.append(selected_word_vector)
-    return np.asarray(window_feature_matrix)
+    return window_feature_matrix([nltk.tokenize.word_tokenize(window) for window in windows], selected_features)
 
 
 def calculate_ngrams_wfm(windows, selected_features, n):
@@ -26,13 +43,61 @@ def calculate_ngrams_wfm(windows, selected_features, n):
             selected_features -- the features against for which the feature vector must be generated
             n -- n in ngrams
     """
-    window_feature_matrix = []
-    for window in windows:
-        ngram_freq = preprocess_NLP_pkg.char_ngram_count_normalised(window, n=n)
-        selected_ngram_freq = preprocess_NLP_pkg.select_feature_vector(ngram_freq, selected_features)
-        selected_ngram_vector = list (selected_ngram_freq.values())
-        window_feature_matrix.append(selected_ngram_vector)
-    return np.asarray(window_feature_matrix)
+    return window_feature_matrix([[window[i:i + n] for i in range(len(window) - n + 1)] for window in windows],
+                                 selected_features)
+
+
+def _pairwise_sum(wfm, term):
+    """Returns the upper triangle pairs (i, j) of the windows and, for each pair, the sum of term(x, y) over the features.
+    Features are accumulated one at a time, in the order in which the scalar distance functions sum them
+            Keyword arguments:
+                wfm -- window feature matrix
+                term -- elementwise function of the feature values x and y of the windows of all pairs
+    """
+    wfm = np.asarray(wfm, dtype=float).reshape(len(wfm), -1)
+    rows, cols = np.triu_indices(len(wfm), 1)
+    features = np.ascontiguousarray(wfm.T)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = term(features[:, rows], features[:, cols])
+    total = np.zeros(len(rows))
+    for feature_terms in terms:
+        total += feature_terms
+    return rows, cols, total
+
+
+def _symmetric_matrix(n, rows, cols, values):
+    dist_m = np.zeros((n, n))
+    dist_m[rows, cols] = values
+    dist_m[cols, rows] = values
+    return dist_m
+
+
+def clark_distance_matrix(wfm):
+    """Clark distances between all windows of a window feature matrix, equal to preprocess_NLP_pkg.clark_distance"""
+    rows, cols, total = _pairwise_sum(wfm, lambda x, y: (np.abs(x - y) / (x + y)) ** 2)
+    return _symmetric_matrix(len(wfm), rows, cols, np.sqrt(total))
+
+
+def matusita_distance_matrix(wfm):
+    """Matusita distances between all windows of a window feature matrix, equal to preprocess_NLP_pkg.matusita_distance"""
+    rows, cols, total = _pairwise_sum(wfm, lambda x, y: (np.sqrt(x) - np.sqrt(y)) ** 2)
+    return _symmetric_matrix(len(wfm), rows, cols, np.sqrt(total))
+
+
+def tanimoto_distance_matrix(wfm):
+    """Tanimoto distances between all windows of a window feature matrix, equal to preprocess_NLP_pkg.tanimoto_distance"""
+    rows, cols, numerator = _pairwise_sum(wfm, lambda x, y: np.abs(x - y))
+    _, _, denominator = _pairwise_sum(wfm, np.maximum)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _symmetric_matrix(len(wfm), rows, cols, numerator / denominator)
+
+
+# distance measures with a vectorized implementation, all of them are symmetric
+distance_matrix_functions = {
+    preprocess_NLP_pkg.clark_distance: clark_distance_matrix,
+    preprocess_NLP_pkg.matusita_distance: matusita_distance_matrix,
+    preprocess_NLP_pkg.tanimoto_distance: tanimoto_distance_matrix
+}
 
 
 def calculate_window_distance(wfm, distance_measure):
@@ -41,6 +106,8 @@ def calculate_window_distance(wfm, distance_measure):
                 wfm -- window feature matrix
                 distance_measure -- any distance function (ideally matusita/ tanimoto)
     """
+    if distance_measure in distance_matrix_functions:
+        return distance_matrix_functions[distance_measure](wfm)
     dist_m = np.zeros((wfm.__len__(),wfm.__len__()))
     for i in range(0,wfm.__len__()):
         window1 = wfm[i]
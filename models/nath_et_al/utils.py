@@ -1,8 +1,7 @@
-import spacy_udpipe
-import stanza
+from nlp_pipelines import LazyStanza, LazyUDPipe
 
-nlp_stanza = stanza.Pipeline(lang='hy',  processors='tokenize, pos, lemma')
-nlp_udpipe = spacy_udpipe.load(lang='hy')
+nlp_stanza = LazyStanza(lang='hy',  processors='tokenize, pos, lemma')
+nlp_udpipe = LazyUDPipe(lang='hy')
 
 
 def lemmatize(text):
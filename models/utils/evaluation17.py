@@ -7,8 +7,12 @@ from __future__ import division
 import os
 import getopt
 import sys
+import re
+import numpy as np
 from models.utils.metrics import Metrics, metrics
 
+WORD_BOUNDARY = re.compile(r'(?<=[^ ]) ')
+
 
 def getMeasureString(measureName, value):
     """Returns the string represenation of one measure with its value."""
@@ -19,28 +23,19 @@ def computeMeasures(inputText, groundTruthData, producedData):
 
     (groundTruthWordPositions, producedDataWordPositions, totalWordCount) = getWordPositionsFromCharacterPositions(inputText, groundTruthData["style_breaches"], producedData["style_breaches"])
 
-    groundTruthStrArray = []
-    producedStrArray = []
-
-    for i in range(0,totalWordCount-1):
-        if i in groundTruthWordPositions: groundTruthStrArray.append("1")
-        else: groundTruthStrArray.append("0")
-
-        if i in producedDataWordPositions: producedStrArray.append("1")
-        else: producedStrArray.append("0")
-
-    # mark last position
-    groundTruthStrArray.append("1")
-    producedStrArray.append("1")
-
-    groundTruthString = ''.join(groundTruthStrArray)
-    producedString = ''.join(producedStrArray)
+    # every word but the last is marked when a breach falls into it, the last position is always marked
+    groundTruthMarks = np.zeros(totalWordCount, dtype=bool)
+    groundTruthMarks[groundTruthWordPositions] = True
+    groundTruthMarks[-1] = True
+    producedMarks = np.zeros(totalWordCount, dtype=bool)
+    producedMarks[producedDataWordPositions] = True
+    producedMarks[-1] = True
 
     halfSegmentLength = 0
     if len(groundTruthWordPositions) == 0: halfSegmentLength = round(totalWordCount / 2)
     else: halfSegmentLength = round(totalWordCount / (len(groundTruthWordPositions) + 1) / 2)
 
-    metric = Metrics(groundTruthString, producedString, halfSegmentLength)
+    metric = Metrics(groundTruthMarks, producedMarks, halfSegmentLength)
     winP = metric.precision()
     winR = metric.recall()
     winF = metric.f1score()
@@ -54,36 +49,42 @@ def computeMeasures(inputText, groundTruthData, producedData):
 
 
 def getWordPositionsFromCharacterPositions(text, groundTruthCharPositions, producedCharPositions):
-    wordCount = 0
-    groundTruthWordPositions = []
-    producedWordPositions = []
+    """Maps breach character offsets to the index of the word they fall into.
+
+    A word ends at every space that follows a non-space, scanning the characters between the first
+    and the last one. Offsets outside of that range are ignored and repeated offsets count once.
+    """
+    # the scan covers 1 .. len(text) - 2, boundaries and offsets out of it never count
+    boundaries = np.array([m.start() for m in WORD_BOUNDARY.finditer(text, 0, max(len(text) - 1, 0))], dtype=int)
 
-    for i in range(1,len(text)-1):
-        if text[i] == ' ' and text[i-1] != ' ':
-            wordCount = wordCount + 1
-        if i in groundTruthCharPositions:
-            groundTruthWordPositions.append(wordCount)
-        if i in producedCharPositions:
-            producedWordPositions.append(wordCount)
+    def wordPositions(charPositions):
+        positions = np.array(sorted({i for i in charPositions if 1 <= i < len(text) - 1}), dtype=int)
+        return np.searchsorted(boundaries, positions, side='right').tolist()
 
-    return (groundTruthWordPositions, producedWordPositions, wordCount+1)
+    return (wordPositions(groundTruthCharPositions), wordPositions(producedCharPositions), len(boundaries) + 1)
 
 
 def style_breach_evaluation(truthDict, predictions, texts):
+    return average_breach_measures(breach_measures(inputText, truthData, producedData)
+                                   for truthData, producedData, inputText in zip(truthDict, predictions, texts))
+
+
+def breach_measures(inputText, truthData, producedData):
+    if not "style_breaches" in truthData:
+        sys.exit("There is no 'positions' key")
+    if not "style_breaches" in producedData:
+        sys.exit("There is no 'positions' key")
+    return computeMeasures(inputText, truthData, producedData)
+
+
+def average_breach_measures(documentMeasures):
     problemsCount = 0
     totalWinR = 0
     totalWinP = 0
     totalWinF = 0
     totalAcc = 0
-    for truthData, producedData, inputText in zip(truthDict, predictions, texts):
+    for (winR, winP, winF, acc) in documentMeasures:
         problemsCount = problemsCount + 1
-
-        if not "style_breaches" in truthData:
-            sys.exit("There is no 'positions' key")
-        if not "style_breaches" in producedData:
-            sys.exit("There is no 'positions' key")
-
-        (winR, winP, winF, acc) = computeMeasures(inputText, truthData, producedData)
         totalWinR += winR
         totalWinP += winP
         totalWinF += winF
@@ -105,15 +106,35 @@ def style_change_evaluation(truthDict, predictions):
     return winP, winR, winF, acc
 
 
-def main(inputDataset, predictions, predictBreaches, config, data_name):
-    texts = [text for _, text, _ in inputDataset]
-    truthDict = [ans if predictBreaches else ans['style_change'] for _, _, ans in inputDataset]
+def evaluate_document(inputText, truth, prediction, predictBreaches):
+    """Returns what `summarize` needs of one document, so the texts need not be kept until the end."""
+    if predictBreaches:
+        return breach_measures(inputText, truth, prediction)
+    return truth['style_change'], prediction['style_change']
+
 
+def summarize(documentResults, predictBreaches):
+    """Returns (WinP, WinR, WinF, Acc) of the evaluate_document results of a dataset."""
     if predictBreaches:
-        WinP, WinR, WinF, Acc = style_breach_evaluation(truthDict, predictions, texts)
-    else:
-        predictions = [d['style_change'] for d in predictions]
-        WinP, WinR, WinF, Acc = style_change_evaluation(truthDict, predictions)
+        return average_breach_measures(documentResults)
+    return style_change_evaluation([truth for truth, _ in documentResults],
+                                   [prediction for _, prediction in documentResults])
+
+
+def evaluate(inputDataset, predictions, predictBreaches):
+    """Returns (WinP, WinR, WinF, Acc) of the predictions for the (name, text, truth) documents."""
+    return summarize([evaluate_document(text, truth, prediction, predictBreaches)
+                      for (_, text, truth), prediction in zip(inputDataset, predictions)], predictBreaches)
+
+
+def main(inputDataset, predictions, predictBreaches, config, data_name):
+    results = evaluate(inputDataset, predictions, predictBreaches)
+    write_results(results, config, data_name)
+    return results
+
+
+def write_results(results, config, data_name):
+    WinP, WinR, WinF, Acc = results
     outStr = getMeasureString("winP", WinP)
     outStr += "\n" + getMeasureString("winR", WinR)
     outStr += "\n" + getMeasureString("winF", WinF)
@@ -123,5 +144,3 @@ def main(inputDataset, predictions, predictBreaches, config, data_name):
                     str(config["features"]["selection"]), str(config["features"]["pca"])])
     with open(os.path.join(config["resultDir"], name), 'w', encoding='utf-8') as outFile:
         outFile.write(outStr)
-
-    return WinP, WinR, WinF, Acc
\ No newline at end of file
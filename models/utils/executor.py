@@ -0,0 +1,79 @@
+import multiprocessing
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterable, List
+
+
+def chunked(items: Iterable, size: int):
+    iterator = iter(items)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def init_nlp_worker():
+    # every worker loads the pipelines once, instead of once per document
+    from nlp_pipelines import registry
+    from feature_extraction.utils import STANZA_LANG, STANZA_PROCESSORS, STANZA_USE_GPU
+    registry.stanza(STANZA_PROCESSORS, lang=STANZA_LANG, use_gpu=STANZA_USE_GPU)
+    registry.udpipe(lang=STANZA_LANG)
+
+
+def _init_worker(store_args, initializer):
+    # workers open their own read-only view of the annotation store and never touch the writer
+    # inherited from the parent, which stays the single writer of the data file and the index
+    from feature_extraction import annotation
+    from feature_extraction.annotation_store import AnnotationStore
+    if store_args is not None:
+        annotation.set_annotation_store(AnnotationStore(*store_args, read_only=True))
+    if initializer is not None:
+        initializer()
+
+
+def _map_chunk(func: Callable[[List], List], chunk: List):
+    # the annotations computed by the worker go back to the parent with the chunk's results
+    from feature_extraction import annotation
+    results = func(chunk)
+    new_annotations = annotation.annotation_store.pop_new() if annotation.annotation_store is not None else []
+    return results, new_annotations
+
+
+def map_documents(func: Callable[[List], List], documents: Iterable, workers: int = 1, chunk_size: int = 8,
+                  initializer: Callable = None):
+    """Applies `func` to chunks of documents and yields its per-document results in input order.
+
+    `func` takes a list of documents and returns a list of results, it must be picklable when
+    `workers` > 1. Documents are read lazily and streamed to the worker processes `chunk_size` at
+    a time, with at most two chunks per worker read ahead of the results.
+    """
+    if workers <= 1:
+        for chunk in chunked(documents, chunk_size):
+            for result in func(chunk):
+                yield result
+        return
+    from feature_extraction import annotation
+    store = annotation.annotation_store
+    store_args = None
+    if store is not None:
+        store.flush()
+        store_args = (store.root, store.max_size_mb, store.version)
+
+    def collect(pending_chunk):
+        results, new_annotations = pending_chunk.get()
+        if store is not None:
+            for text, tokens in new_annotations:
+                store.put(text, tokens)
+        return results
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(store_args, initializer)) as pool:
+        # Pool.imap would read the whole input ahead, apply_async keeps the number of queued chunks bounded
+        pending = deque()
+        for chunk in chunked(documents, chunk_size):
+            pending.append(pool.apply_async(_map_chunk, (func, chunk)))
+            if len(pending) >= 2 * workers:
+                for result in collect(pending.popleft()):
+                    yield result
+        while pending:
+            for result in collect(pending.popleft()):
+                yield result
@@ -12,6 +12,7 @@
 ##########################################################################
 
 import sys
+import numpy as np
 from sklearn.metrics import precision_score, recall_score, f1_score, accuracy_score
 
 
@@ -28,14 +29,40 @@ class Metrics:
     k = 1  # window size
 
     def __init__(self, gold_seg, hypo_seg, k, boundary="1"):
+        """Segmentations are strings with `boundary` marking the boundaries, or boolean (0/1) arrays."""
         self.k = k
         if len(gold_seg) != len(hypo_seg):
             sys.exit("Segmentations have unequal length")
-        if self.k != 0:
+        gold = self.boundary_marks(gold_seg, boundary)
+        hypo = self.boundary_marks(hypo_seg, boundary)
+        if self.k > 0:
+            self.update_windows(gold, hypo)
+        elif self.k != 0:
             for i in range(len(gold_seg) + 1 - self.k):
-                self.update(gold_seg[i:i + k].count(boundary), hypo_seg[i:i + k].count(boundary))
+                self.update(int(gold[i:i + k].sum()), int(hypo[i:i + k].sum()))
         else:
-            self.update(gold_seg[0].count(boundary), hypo_seg[0].count(boundary))
+            self.update(int(gold[0]), int(hypo[0]))
+
+    @staticmethod
+    def boundary_marks(seg, boundary="1"):
+        if isinstance(seg, str):
+            return np.array(list(seg)) == boundary
+        return np.asarray(seg, dtype=bool)
+
+    def update_windows(self, gold, hypo):
+        """Same as calling update for every window of size k, with the window counts taken from prefix sums."""
+        windows = len(gold) + 1 - self.k
+        if windows <= 0:
+            return
+        gold_counts = np.concatenate(([0], np.cumsum(gold)))
+        hypo_counts = np.concatenate(([0], np.cumsum(hypo)))
+        gold_counts = gold_counts[self.k:] - gold_counts[:-self.k]
+        hypo_counts = hypo_counts[self.k:] - hypo_counts[:-self.k]
+        # the counts are integers, so the sums are exactly the ones of the window by window updates
+        self.tp += float(np.minimum(gold_counts, hypo_counts).sum())
+        self.tn += float(windows * self.k - np.maximum(gold_counts, hypo_counts).sum())
+        self.fn += float(np.maximum(0, gold_counts - hypo_counts).sum())
+        self.fp += float(np.maximum(0, hypo_counts - gold_counts).sum())
 
     def precision(self):
         if self.tp == 0:
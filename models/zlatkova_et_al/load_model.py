@@ -1,51 +1,37 @@
-import jsonpickle
-import json
-import pickle
-import numpy as np
-import os
+from .models import StackingSimple
+from .model_bundle import ModelBundleError, read_manifest, load_estimators
 
-from .features import lexical
-from .features.word_frequency import WordFrequency
-from .transformers import phrase_frequency
-from .transformers import frequent_words_diff
-from .features import readability
-from .transformers import max_diff
-from .transformers import text_length
+BUNDLE_ESTIMATORS = {
+    'StackingSimple': StackingSimple,
+}
 
 
-def load_model(path_to_model):
-    predictors = []
-    scalers = []
-    with open(os.path.join(path_to_model, 'predictors.pckl'), 'rb') as f:
-        while True:
-            try:
-                predictors.append(pickle.load(f))
-            except:
-                break
-    with open(os.path.join(path_to_model, 'scalers.pckl'), 'rb') as f:
-        while True:
-            try:
-                scalers.append(pickle.load(f))
-            except:
-                break
-    with open(os.path.join(path_to_model, 'model.json'), 'r') as f:
-        js = json.load(f)
-        model = jsonpickle.decode(js)
+def load_model(path_to_model, mmap_mode=None):
+    """Loads a model bundle written by save_model.
 
-    phrase_frequency_func = lambda x: np.array(phrase_frequency(x, **model.params['phrase_transformer']))
-    frequent_words_diff_func = lambda x: np.array(frequent_words_diff(x, **model.params['frequent_words_diff_transformer']))
-    min_max_lexical_per_segment_func = lambda x: max_diff(lexical(x))
-    rare_richness_func = lambda x: max_diff(WordFrequency().average_word_frequency((x)))
-    text_length_func = lambda x: np.array(text_length(x))
-    readability_func = lambda x: np.array(max_diff(readability(x)))
+    The estimators are only read when the model first uses them, with `mmap_mode='r'` their numpy
+    arrays are memory-mapped instead of copied into memory. Raises ModelBundleError when the bundle
+    is missing, of another version or corrupted.
+    """
+    manifest = read_manifest(path_to_model)
+    if manifest['estimator'] not in BUNDLE_ESTIMATORS:
+        raise ModelBundleError('Unknown estimator {0} in model bundle {1}'.format(manifest['estimator'], path_to_model))
+    estimators = load_estimators(path_to_model, manifest, mmap_mode)
 
-    model.stack = [
-        (min_max_lexical_per_segment_func, True, True, scalers[0], predictors[0]),
-        (rare_richness_func, True, False, scalers[1], predictors[1]),
-        (phrase_frequency_func, False, False, scalers[2], predictors[2]),
-        (frequent_words_diff_func, False, False, scalers[3], predictors[3]),
-        (readability_func, True, False, scalers[4], predictors[4]),
-        (text_length_func, False, False, scalers[5], predictors[5])
-    ]
+    model = BUNDLE_ESTIMATORS[manifest['estimator']]()
+    model.params = manifest['params']
+    try:
+        model.stack = [
+            (model.get_transformer(level['transformer']), level['apply_on_word_chunks'], level['preprocess'],
+             estimators[level['scaler']], [estimators[name] for name in level['predictors']])
+            for level in manifest['stack']
+        ]
+        model.raw_text_models = [estimators[name] for name in manifest['raw_text_models']]
+        if manifest['meta_learner'] is not None:
+            model.meta_learner = estimators[manifest['meta_learner']]
+    except KeyError as e:
+        raise ModelBundleError('Model bundle {0} references unknown {1}'.format(path_to_model, e)) from e
+    if manifest['global_model_weights'] is not None:
+        model.global_model_weights = manifest['global_model_weights']
 
-    return model
\ No newline at end of file
+    return model
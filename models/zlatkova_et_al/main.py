@@ -4,7 +4,8 @@ from sklearn.metrics import accuracy_score
 from nltk import ConfusionMatrix
 import numpy as np
 
-from .utils import get_data, get_n_jobs, get_arguments, split_data
+from .utils import get_data, get_n_jobs, get_arguments, split_data, sentence_offsets, \
+    clear_annotation_caches
 from .models import StackingSimple
 from .chunkers import get_sentences
 
@@ -85,13 +86,14 @@ def train(train_data, valid_data,
 
 
 def get_breach_predictions(clf, test_x, change_predictions):
+    documents = [get_sentences(text) for has_change, text in zip(change_predictions, test_x) if has_change]
+    breaches = iter(find_breaches_batch(clf, [(sentences, 0, len(sentences)) for sentences in documents]))
+
     predictions = []
-    for has_change, text in zip(change_predictions, test_x):
+    for has_change in change_predictions:
         if has_change:
-            sentences = get_sentences(text)
-            breaches = find_breaches(clf, sentences, 0, len(sentences))
-            print('BREACHES: ', breaches)
-            predictions.append(breaches)
+            predictions.append(next(breaches))
+            print('BREACHES: ', predictions[-1])
         else:
             predictions.append([])
 
@@ -99,22 +101,37 @@ def get_breach_predictions(clf, test_x, change_predictions):
 
 
 def find_breaches(clf, sentences, l, r):
-    x = np.expand_dims(' '.join(sentences[l:r]), axis=0)
-    has_change = clf.predict(x)[0]
-
-    if not has_change:
-        return []
-
-    if r - l <= 10:
-        return [len(' '.join(sentences[:(l+r)//2]))]
-    else:
-        mid = (r-l) // 2
-        left = find_breaches(clf, sentences, l, l+mid)
-        right = find_breaches(clf, sentences, l+mid, r)
-        if len(left) == 0 and len(right) == 0:
-            return [len(' '.join(sentences[:l+mid]))]
-
-        return left + right
+    return find_breaches_batch(clf, [(sentences, l, r)])[0]
+
+
+def find_breaches_batch(clf, segments):
+    """Bisects (sentences, l, r) segments while they are predicted to contain a change.
+
+    The search is breadth first, so all the segments of a level of the bisection are passed to
+    `clf.predict` at once. Returns the breach offsets of each segment.
+    """
+    offsets = [sentence_offsets(sentences) for sentences, _, _ in segments]
+    level = [(i, l, r) for i, (_, l, r) in enumerate(segments)]
+    levels = []
+    while level:
+        has_change = clf.predict(np.array([' '.join(segments[i][0][l:r]) for i, l, r in level]))
+        levels.append(list(zip(level, has_change)))
+        level = [child for (i, l, r), change in levels[-1] if change and r - l > 10
+                 for child in ((i, l, l + (r-l) // 2), (i, l + (r-l) // 2, r))]
+
+    breaches = {}
+    for level in reversed(levels):
+        for (i, l, r), change in level:
+            if not change:
+                breaches[i, l, r] = []
+            elif r - l <= 10:
+                breaches[i, l, r] = [offsets[i][(l+r)//2]]
+            else:
+                mid = l + (r-l) // 2
+                breaches[i, l, r] = breaches.pop((i, l, mid)) + breaches.pop((i, mid, r)) or [offsets[i][mid]]
+
+    clear_annotation_caches()
+    return [breaches[i, l, r] for i, (_, l, r) in enumerate(segments)]
 
 
 def test(clf, train_x, train_y, train_positions, with_full_data_tfidf, test_x):
@@ -0,0 +1,94 @@
+import os
+import json
+import hashlib
+import joblib
+
+BUNDLE_FORMAT = 'zlatkova-stacking'
+BUNDLE_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+ESTIMATORS_DIR = 'estimators'
+
+
+class ModelBundleError(IOError):
+    pass
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_bundle(path, manifest, estimators):
+    """Saves a model bundle: one joblib file per estimator and a manifest with their checksums.
+
+    `estimators` maps the bundle file names referenced from `manifest` to the fitted estimators.
+    The files are written uncompressed, so their numpy arrays can be memory-mapped on load. The
+    manifest is replaced last, files left from an earlier save are removed afterwards.
+    """
+    estimators_dir = os.path.join(path, ESTIMATORS_DIR)
+    if not os.path.exists(estimators_dir):
+        os.makedirs(estimators_dir)
+    files = {}
+    for name, estimator in estimators.items():
+        file_path = os.path.join(estimators_dir, name)
+        joblib.dump(estimator, file_path)
+        files[name] = {'sha256': file_checksum(file_path), 'size': os.path.getsize(file_path)}
+    manifest = dict(manifest, format=BUNDLE_FORMAT, version=BUNDLE_VERSION, files=files)
+    with open(os.path.join(path, MANIFEST_FILE + '.tmp'), 'w', encoding='utf8') as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(os.path.join(path, MANIFEST_FILE + '.tmp'), os.path.join(path, MANIFEST_FILE))
+    for name in os.listdir(estimators_dir):
+        if name not in files:
+            os.remove(os.path.join(estimators_dir, name))
+
+
+def read_manifest(path):
+    """Reads and checks the manifest of a bundle, estimator files must exist with their saved size."""
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise ModelBundleError('No model bundle in {0}, the model has to be saved again'.format(path))
+    try:
+        with open(manifest_path, 'r', encoding='utf8') as f:
+            manifest = json.load(f)
+    except ValueError as e:
+        raise ModelBundleError('Corrupted manifest {0}: {1}'.format(manifest_path, e)) from e
+    if manifest.get('format') != BUNDLE_FORMAT or manifest.get('version') != BUNDLE_VERSION:
+        raise ModelBundleError('Unsupported model bundle {0} version {1} in {2}'.format(
+            manifest.get('format'), manifest.get('version'), path))
+    for name, info in manifest['files'].items():
+        file_path = os.path.join(path, ESTIMATORS_DIR, name)
+        if not os.path.exists(file_path) or os.path.getsize(file_path) != info['size']:
+            raise ModelBundleError('Missing or truncated estimator file {0}'.format(file_path))
+    return manifest
+
+
+class LazyEstimator(object):
+    """An estimator of a bundle that is only read, and checked against its checksum, when first used."""
+
+    def __init__(self, path, name, info, mmap_mode=None):
+        self._path = os.path.join(path, ESTIMATORS_DIR, name)
+        self._sha256 = info['sha256']
+        self._mmap_mode = mmap_mode
+        self._estimator = None
+
+    def load(self):
+        if self._estimator is None:
+            if file_checksum(self._path) != self._sha256:
+                raise ModelBundleError('Checksum mismatch for estimator file {0}'.format(self._path))
+            try:
+                self._estimator = joblib.load(self._path, mmap_mode=self._mmap_mode)
+            except Exception as e:
+                raise ModelBundleError('Could not load estimator file {0}: {1}'.format(self._path, e)) from e
+        return self._estimator
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+
+def load_estimators(path, manifest, mmap_mode=None):
+    return {name: LazyEstimator(path, name, info, mmap_mode) for name, info in manifest['files'].items()}
@@ -0,0 +1,33 @@
+import hashlib
+import numpy as np
+
+
+def document_key(entry):
+    # entries are texts or (text, word segments) pairs from the word chunkers
+    return hashlib.sha1(repr(entry).encode('utf8')).hexdigest()
+
+
+class FeatureCache(object):
+    """Transformer outputs per document, so overlapping fits only transform each document once.
+
+    The transformers compute every row from its own document, so the rows of a document can be
+    reused whenever the same transformer with the same parameters sees it again. `transformer_key`
+    has to identify both, the cache is meant to live for a single fit.
+    """
+
+    def __init__(self):
+        self.rows = {}
+
+    def transform(self, transformer_key, transformer, data):
+        keys = [(transformer_key, document_key(entry)) for entry in data]
+        missing = {}
+        for entry, key in zip(data, keys):
+            if key not in self.rows and key not in missing:
+                missing[key] = entry
+        if missing:
+            for key, row in zip(missing, transformer(list(missing.values()))):
+                self.rows[key] = row
+        return np.array([self.rows[key] for key in keys])
+
+    def clear(self):
+        self.rows = {}
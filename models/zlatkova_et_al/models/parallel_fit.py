@@ -0,0 +1,49 @@
+import os
+import multiprocessing
+
+NATIVE_THREADS_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+_thread_limits = None
+
+
+def _limit_native_threads(threads):
+    # the BLAS and OpenMP pools numpy and scikit-learn already loaded would use every core in each worker
+    global _thread_limits
+    for name in NATIVE_THREADS_VARS:
+        os.environ[name] = str(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return  # without threadpoolctl only the thread pools started from now on see the variables
+    _thread_limits = threadpool_limits(limits=threads)
+
+
+def _fit_predict(job):
+    predictor, train_data, train_y, test_data, threads = job
+    # a predictor using all cores in each of the pool processes would oversubscribe the machine
+    n_jobs = predictor.get_params().get('n_jobs') if threads else None
+    limit_threads = n_jobs is not None and (n_jobs < 0 or n_jobs > threads)
+    if limit_threads:
+        predictor.set_params(n_jobs=threads)
+    predictor.fit(train_data, train_y)
+    probabilities = predictor.predict_proba(test_data).tolist() if test_data is not None else None
+    if limit_threads:
+        predictor.set_params(n_jobs=n_jobs)
+    return predictor, probabilities
+
+
+def fit_predictors(jobs, n_jobs=1):
+    """Fits the predictors of (predictor, train data, train labels, test data) jobs.
+
+    Returns (fitted predictor, test probabilities or None) pairs in job order. With n_jobs > 1
+    (or -1 for all cores) the jobs run in a process pool and the predictors that come back are
+    fitted copies. Each worker gets an equal share of the cores, both for the predictors' own n_jobs
+    and for the native BLAS/OpenMP thread pools.
+    """
+    if n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, len(jobs))
+    if n_jobs <= 1:
+        return [_fit_predict(job + (None,)) for job in jobs]
+    threads = max(1, (os.cpu_count() or 1) // n_jobs)
+    with multiprocessing.Pool(n_jobs, initializer=_limit_native_threads, initargs=(threads,)) as pool:
+        return pool.map(_fit_predict, [job + (threads,) for job in jobs], chunksize=1)
@@ -6,6 +6,9 @@ from sklearn.neural_network import MLPClassifier
 from sklearn.preprocessing import StandardScaler
 
 from ..models.base_estimator import BaseEstimator
+from ..models.parallel_fit import fit_predictors
+from ..models.feature_cache import FeatureCache
+from ..utils import clear_annotation_caches
 from ..features import lexical
 from ..chunkers import word_chunks
 from ..features.word_frequency import WordFrequency
@@ -102,6 +105,7 @@ class Stacking(BaseEstimator):
                     'gunning_fog'
                  ]
             },
+            'n_jobs': 1,
         }
 
     def fit_with_test(self, train_x, train_y, train_positions, test_x):
@@ -193,6 +197,9 @@ class Stacking(BaseEstimator):
             ]),
         ]
 
+        # the full fit below sees the documents of the meta split again
+        self.feature_cache = FeatureCache()
+
         if(self.params['meta_learner']):
             self.global_model_weights = []
 
@@ -205,6 +212,8 @@ class Stacking(BaseEstimator):
             self.meta_learner.fit(self.convert_to_meta_input(predictions_zero), train_y_meta)
 
         self.stack_fit_predict(train_x, train_y)
+        self.feature_cache.clear()
+        clear_annotation_caches()
 
     def predict(self, test_x):
         test_x_preprocessed = [preprocessor.process_text(x) for x in test_x]
@@ -253,27 +262,37 @@ class Stacking(BaseEstimator):
 
         if(test_x): test_size = len(test_x)
 
-        for transformer, apply_on_word_chunks, preprocess, scaler, predictors in self.stack:
+        jobs = []
+        transformed = []
+        for index, (transformer, apply_on_word_chunks, preprocess, scaler, predictors) in enumerate(self.stack):
             if(preprocess):
                 raw_data = train_word_chunks_preprocessed if apply_on_word_chunks else train_x_preprocessed
             else:
                 raw_data = train_word_chunks if apply_on_word_chunks else train_x
 
-            data_transformed_zero = scaler.fit_transform(transformer(raw_data))
+            data_transformed_zero = scaler.fit_transform(self.feature_cache.transform(index, transformer, raw_data))
 
+            data_transformed_meta = None
             if(test_x):
                 if(preprocess):
                     raw_test = test_word_chunks_preprocessed if apply_on_word_chunks else test_x_preprocessed
                 else:
                     raw_test = test_word_chunks if apply_on_word_chunks else test_x
 
-                data_transformed_meta = scaler.transform(transformer(raw_test))
+                data_transformed_meta = scaler.transform(self.feature_cache.transform(index, transformer, raw_test))
+
+            transformed.append(data_transformed_zero)
+            jobs.extend((predictor, data_transformed_zero, train_y, data_transformed_meta) for predictor in predictors)
+
+        # the transformers run above, only the base learners are fitted in parallel
+        fitted = iter(fit_predictors(jobs, self.params['n_jobs']))
 
+        for (transformer, apply_on_word_chunks, preprocess, scaler, predictors), data_transformed_zero in zip(self.stack, transformed):
             local_predictions = []
-            for predictor in predictors:
-                predictor.fit(data_transformed_zero, train_y)
+            for i in range(len(predictors)):
+                predictors[i], test_probs = next(fitted)
 
-                if(test_x): local_predictions.append(predictor.predict_proba(data_transformed_meta).tolist())
+                if(test_x): local_predictions.append(test_probs)
 
             if(test_x):
                 scores = []
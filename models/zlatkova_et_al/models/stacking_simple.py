@@ -7,8 +7,11 @@ from sklearn.neural_network import MLPClassifier
 from sklearn.preprocessing import StandardScaler
 
 from ..models.base_estimator import BaseEstimator
+from ..models.parallel_fit import fit_predictors
+from ..models.feature_cache import FeatureCache
 from ..models.light_gbm_model import LightGbmWithLogReg
 from ..models.character_cnn import CharacterCNN
+from ..utils import clear_annotation_caches
 from ..features import lexical
 from ..chunkers import word_chunks
 from ..features.word_frequency import WordFrequency
@@ -18,16 +21,22 @@ from ..features import readability
 from ..transformers import max_diff
 from ..transformers import text_length
 from ..preprocessing.basic_preprocessor import BasicPreprocessor
-
-import jsonpickle
-import json
-import os
-import pickle
+from ..model_bundle import save_bundle
 
 
 preprocessor = BasicPreprocessor()
 
 class StackingSimple(BaseEstimator):
+    # (transformer id, apply on word chunks, preprocess) of every level of the stack
+    stack_transformers = [
+        ('min_max_lexical_per_segment', True, True),
+        ('rare_richness', True, False),
+        ('phrase_frequency', False, False),
+        ('frequent_words_diff', False, False),
+        ('readability', True, False),
+        ('text_length', False, False),
+    ]
+
     def __init__(self):
         self.params = {
             'model_description': 'Meta Stacking',
@@ -111,62 +120,34 @@ class StackingSimple(BaseEstimator):
             'output_probabilities_train': False,
             'output_probabilities_test': False,
             'use_nn' : False,
+            'n_jobs': 1,
         }
 
+    def get_transformer(self, transformer_id):
+        transformers = {
+            'min_max_lexical_per_segment': lambda x: max_diff(lexical(x)),
+            'rare_richness': lambda x: max_diff(WordFrequency().average_word_frequency((x))),
+            'phrase_frequency': lambda x: np.array(phrase_frequency(x, **self.params['phrase_transformer'])),
+            'frequent_words_diff': lambda x: np.array(frequent_words_diff(x, **self.params['frequent_words_diff_transformer'])),
+            'readability': lambda x: np.array(max_diff(readability(x))),
+            'text_length': lambda x: np.array(text_length(x)),
+        }
+        return transformers[transformer_id]
+
     def fit_with_test(self, train_x, train_y, train_positions=None, test_x=None):
         self.fit(train_x, train_y, train_positions, test_x)
 
     def fit(self, train_x, train_y, train_positions=None, test_x=None):
         train_x = [preprocessor.process_text(x) for x in train_x]
-        phrase_frequency_func = lambda x: np.array(phrase_frequency(x, **self.params['phrase_transformer']))
-        frequent_words_diff_func = lambda x: np.array(frequent_words_diff(x, **self.params['frequent_words_diff_transformer']))
-        min_max_lexical_per_segment_func = lambda x: max_diff(lexical(x))
-        rare_richness_func = lambda x: max_diff(WordFrequency().average_word_frequency((x)))
-        text_length_func = lambda x: np.array(text_length(x))
-        readability_func = lambda x: np.array(max_diff(readability(x)))
 
         self.stack = [
-            (min_max_lexical_per_segment_func, True, True, StandardScaler(**self.params['scaler_params']), [
-                RandomForestClassifier(**self.params['rf_params']),
-                MLPClassifier(**self.params['mlp_params']),
-                SVC(**self.params['svm_params']),
-                AdaBoostClassifier(**self.params['ab_params']),
-            ]),
-
-            (rare_richness_func, True, False, StandardScaler(**self.params['scaler_params']), [
-                RandomForestClassifier(**self.params['rf_params']),
-                MLPClassifier(**self.params['mlp_params']),
-                SVC(**self.params['svm_params']),
-                AdaBoostClassifier(**self.params['ab_params']),
-            ]),
-
-            (phrase_frequency_func, False, False, StandardScaler(**self.params['scaler_params']), [
-                RandomForestClassifier(**self.params['rf_params']),
-                MLPClassifier(**self.params['mlp_params']),
-                SVC(**self.params['svm_params']),
-                AdaBoostClassifier(**self.params['ab_params']),
-            ]),
-
-            (frequent_words_diff_func, False, False, StandardScaler(**self.params['scaler_params']), [
-                RandomForestClassifier(**self.params['rf_params']),
-                MLPClassifier(**self.params['mlp_params']),
-                SVC(**self.params['svm_params']),
-                AdaBoostClassifier(**self.params['ab_params']),
-            ]),
-
-            (readability_func, True, False, StandardScaler(**self.params['scaler_params']), [
-                RandomForestClassifier(**self.params['rf_params']),
-                MLPClassifier(**self.params['mlp_params']),
-                SVC(**self.params['svm_params']),
-                AdaBoostClassifier(**self.params['ab_params']),
-            ]),
-
-            (text_length_func, False, False, StandardScaler(**self.params['scaler_params']), [
+            (self.get_transformer(transformer_id), apply_on_word_chunks, preprocess, StandardScaler(**self.params['scaler_params']), [
                 RandomForestClassifier(**self.params['rf_params']),
                 MLPClassifier(**self.params['mlp_params']),
                 SVC(**self.params['svm_params']),
                 AdaBoostClassifier(**self.params['ab_params']),
             ])
+            for transformer_id, apply_on_word_chunks, preprocess in self.stack_transformers
         ]
 
         self.raw_text_models = [
@@ -176,6 +157,9 @@ class StackingSimple(BaseEstimator):
         if self.params["use_nn"]:
             self.raw_text_models.append(CharacterCNN())
 
+        # the full fit below sees the documents of the meta split again
+        self.feature_cache = FeatureCache()
+
         if(self.params['meta_learner']):
             self.global_model_weights = []
 
@@ -187,6 +171,8 @@ class StackingSimple(BaseEstimator):
             self.meta_learner.fit(self.convert_to_meta_input(predictions_zero), train_y_meta)
 
         self.stack_fit_predict(train_x, train_y, test_additional=test_x)
+        self.feature_cache.clear()
+        clear_annotation_caches()
 
     def predict(self, test_x):
         predictions = []
@@ -271,30 +257,40 @@ class StackingSimple(BaseEstimator):
             test_word_chunks_preprocessed = word_chunks(test_x_preprocessed, chunks=3, process=True, sliding=True)
         print("Computed word chunks")
 
-        for transformer, apply_on_word_chunks, preprocess, scaler, predictors in self.stack:
+        jobs = []
+        transformed = []
+        for index, (transformer, apply_on_word_chunks, preprocess, scaler, predictors) in enumerate(self.stack):
             if preprocess:
                 raw_data = train_word_chunks_preprocessed if apply_on_word_chunks else train_x_preprocessed
             else:
                 raw_data = train_word_chunks if apply_on_word_chunks else train_x
 
-            data_transformed_zero = scaler.fit_transform(transformer(raw_data))
+            data_transformed_zero = scaler.fit_transform(self.feature_cache.transform(index, transformer, raw_data))
 
+            data_transformed_meta = None
             if(test_x):
                 if preprocess:
                     raw_test = test_word_chunks_preprocessed if apply_on_word_chunks else test_x_preprocessed
                 else:
                     raw_test = test_word_chunks if apply_on_word_chunks else test_x
 
-                data_transformed_meta = scaler.transform(transformer(raw_test))
+                data_transformed_meta = scaler.transform(self.feature_cache.transform(index, transformer, raw_test))
+
+            transformed.append(data_transformed_zero)
+            jobs.extend((predictor, data_transformed_zero, train_y, data_transformed_meta) for predictor in predictors)
 
+        # the transformers run above, only the base learners are fitted in parallel
+        fitted = iter(fit_predictors(jobs, self.params['n_jobs']))
+
+        for (transformer, apply_on_word_chunks, preprocess, scaler, predictors), data_transformed_zero in zip(self.stack, transformed):
             local_predictions = []
-            for predictor in predictors:
-                predictor.fit(data_transformed_zero, train_y)
+            for i in range(len(predictors)):
+                predictors[i], test_probs = next(fitted)
 
                 if(test_x):
-                    local_predictions.append(predictor.predict_proba(data_transformed_meta).tolist())
+                    local_predictions.append(test_probs)
                 if self.params['output_probabilities_train']:
-                    res = pd.DataFrame(predictor.predict_proba(data_transformed_zero))
+                    res = pd.DataFrame(predictors[i].predict_proba(data_transformed_zero))
                     res.to_csv("model_{0}_train.csv".format(cnt))
                     cnt += 1
 
@@ -344,18 +340,30 @@ class StackingSimple(BaseEstimator):
     def get_grid_params(self): pass
 
     def save_model(self, filepath=""):
-        json_txt = jsonpickle.encode(self, indent=4)
-        modelJSON = json.dumps(json_txt)
-        with open(os.path.join(filepath, "model.json"), 'w') as file:
-            file.write(modelJSON)
-        predictors = []
-        scalers = []
-        for model in self.stack:
-            predictors.append(model[-1])
-            scalers.append(model[-2])
-        with open(os.path.join(filepath, "predictors.pckl"), "ab") as f:
-            for predictor in predictors:
-                pickle.dump(predictor, f)
-        with open(os.path.join(filepath, "scalers.pckl"), "ab") as f:
-            for scaler in scalers:
-                pickle.dump(scaler, f)
+        manifest = {
+            'estimator': type(self).__name__,
+            'params': self.params,
+            'stack': [],
+            'raw_text_models': [],
+            'meta_learner': None,
+            'global_model_weights': getattr(self, 'global_model_weights', None),
+        }
+        estimators = {}
+        for index, ((transformer_id, apply_on_word_chunks, preprocess), (_, _, _, scaler, predictors)) in enumerate(zip(self.stack_transformers, self.stack)):
+            level = {
+                'transformer': transformer_id,
+                'apply_on_word_chunks': apply_on_word_chunks,
+                'preprocess': preprocess,
+                'scaler': 'stack_{0}_scaler.joblib'.format(index),
+                'predictors': ['stack_{0}_predictor_{1}.joblib'.format(index, i) for i in range(len(predictors))],
+            }
+            estimators[level['scaler']] = scaler
+            estimators.update(zip(level['predictors'], predictors))
+            manifest['stack'].append(level)
+        for index, model in enumerate(self.raw_text_models):
+            manifest['raw_text_models'].append('raw_text_model_{0}.joblib'.format(index))
+            estimators[manifest['raw_text_models'][-1]] = model
+        if self.params['meta_learner']:
+            manifest['meta_learner'] = 'meta_learner.joblib'
+            estimators[manifest['meta_learner']] = self.meta_learner
+        save_bundle(filepath, manifest, estimators)
@@ -1,37 +1,56 @@
 import os
 import json
-from itertools import zip_longest
+from itertools import zip_longest, accumulate
+from functools import lru_cache
 from time import gmtime, strftime
 import pandas as pd
 import numpy as np
 from argparse import ArgumentParser
 from sklearn.model_selection import train_test_split
-import spacy_udpipe
 from collections import Counter
 import math
 import re
-import stanza
 from typing import List, Tuple
+from nlp_pipelines import LazyStanza, LazyUDPipe
 
 
-nlp = spacy_udpipe.load(lang='hy')
-nlp_stanza = stanza.Pipeline(lang='hy', processors='tokenize, pos, lemma')
+nlp = LazyUDPipe(lang='hy')
+nlp_stanza = LazyStanza(lang='hy', processors='tokenize, pos, lemma')
 
 
-def lemmatizer(text):
+# the transformers annotate the same texts again and again, e.g. the segments of a breach search
+# are tokenized by the chunkers and by several features, so the annotations are kept per text
+ANNOTATION_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=ANNOTATION_CACHE_SIZE)
+def stanza_annotations(text):
     doc = nlp_stanza(text)
-    return [word.lemma for sentence in doc.sentences for word in sentence.words]
+    return tuple((word.lemma, word.pos) for sentence in doc.sentences for word in sentence.words)
+
+
+@lru_cache(maxsize=ANNOTATION_CACHE_SIZE)
+def udpipe_tokens(text):
+    return tuple(word.text for word in nlp(text))
+
+
+def clear_annotation_caches():
+    # the caches are keyed on whole texts, they only live for one fit or one breach search
+    stanza_annotations.cache_clear()
+    udpipe_tokens.cache_clear()
+
+
+def lemmatizer(text):
+    return [lemma for lemma, _ in stanza_annotations(text)]
 
 
 def pos_tagger(text):
-    doc = nlp_stanza(text)
-    return [word.pos for sentence in doc.sentences for word in sentence.words]
+    return [pos for _, pos in stanza_annotations(text)]
 
 
 def word_tokenize(text, remove_punctuation=False):
     text = remove_punct(text) if remove_punctuation else text
-    doc = nlp(text)
-    return [word.text for word in doc]
+    return list(udpipe_tokens(text))
 
 
 def sentence_tokenizer(text):
@@ -167,6 +186,11 @@ def gunning_fog(words, sentences_count):
     return round(GF, 2)
 
 
+def sentence_offsets(sentences):
+    """Returns len(' '.join(sentences[:k])) for every k from 0 to len(sentences)."""
+    return [0] + [end - 1 for end in accumulate(len(sentence) + 1 for sentence in sentences)]
+
+
 def print_splits(texts, positions):
     text_colors = ['1;31', '1;32', '1;33', '1;34']
 
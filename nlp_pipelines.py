@@ -0,0 +1,89 @@
+import time
+import resource
+from profiling import profiler
+
+# processors that only add annotations and leave tokens, words, lemmas and tags of the others untouched
+ADDITIVE_PROCESSORS = {'depparse', 'ner', 'sentiment'}
+
+
+def _processor_set(processors: str):
+    return frozenset(processor.strip() for processor in processors.split(',') if processor.strip())
+
+
+def _max_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class PipelineRegistry(object):
+    """Process-wide registry of NLP pipelines, each configuration is loaded on first use only.
+
+    A stanza request is served by an already loaded pipeline when that pipeline runs all of the
+    requested processors and its extra processors are additive, so they can not change the
+    requested annotations.
+    """
+
+    def __init__(self):
+        self._stanza = {}
+        self._udpipe = {}
+        self.loads = []
+
+    def stanza(self, processors: str, lang: str = 'hy', use_gpu: bool = None):
+        """Returns a stanza pipeline, `use_gpu` None keeps stanza's own default."""
+        requested = _processor_set(processors)
+        for (pipeline_lang, pipeline_processors, pipeline_gpu), pipeline in self._stanza.items():
+            if pipeline_lang == lang and pipeline_gpu == use_gpu and requested <= pipeline_processors \
+                    and pipeline_processors - requested <= ADDITIVE_PROCESSORS:
+                return pipeline
+        import stanza
+        options = {} if use_gpu is None else {"use_gpu": use_gpu}
+        pipeline = self._load("stanza " + lang + " " + ",".join(sorted(requested)),
+                              lambda: stanza.Pipeline(lang=lang, processors=processors, **options))
+        self._stanza[(lang, requested, use_gpu)] = pipeline
+        return pipeline
+
+    def udpipe(self, lang: str = 'hy'):
+        if lang not in self._udpipe:
+            import spacy_udpipe
+            self._udpipe[lang] = self._load("udpipe " + lang, lambda: spacy_udpipe.load(lang=lang))
+        return self._udpipe[lang]
+
+    def _load(self, name: str, loader):
+        start_time = time.time()
+        rss_before = _max_rss_mb()
+        with profiler.stage("nlp_load"):
+            pipeline = loader()
+        load = {"pipeline": name, "seconds": time.time() - start_time, "max_rss_mb": _max_rss_mb() - rss_before}
+        self.loads.append(load)
+        print("loaded {pipeline} in {seconds:.2f}s, max RSS +{max_rss_mb:.0f} MB".format(**load))
+        return pipeline
+
+    def report(self):
+        return {"loads": list(self.loads), "max_rss_mb": _max_rss_mb()}
+
+
+registry = PipelineRegistry()
+
+
+class LazyStanza(object):
+    """Stands in for a stanza.Pipeline and loads it from the registry when first called."""
+
+    def __init__(self, processors: str, lang: str = 'hy', use_gpu: bool = None):
+        self.processors = processors
+        self.lang = lang
+        self.use_gpu = use_gpu
+
+    def __call__(self, text):
+        with profiler.stage("nlp_parse"):
+            return registry.stanza(self.processors, self.lang, self.use_gpu)(text)
+
+
+class LazyUDPipe(object):
+    """Stands in for a spacy_udpipe model and loads it from the registry when first called."""
+
+    def __init__(self, lang: str = 'hy'):
+        self.lang = lang
+
+    def __call__(self, text):
+        with profiler.stage("nlp_parse"):
+            return registry.udpipe(self.lang)(text)
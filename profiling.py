@@ -0,0 +1,160 @@
+import os
+import csv
+import json
+import time
+import heapq
+import hashlib
+import cProfile
+from contextlib import contextmanager
+
+CPROFILE_DIR = "cprofile"
+
+
+def document_id(text):
+    return hashlib.sha1(text.encode("utf8")).hexdigest()[:12]
+
+
+class StageProfiler(object):
+    """Wall-clock time and call counts of the pipeline stages, per document and for the whole run.
+
+    Stages can nest, a stage only gets its own time and not the time of the stages it calls, so
+    the stages of a document add up to its total. Stages outside of a document count for the run.
+    Every process has its own profiler, worker processes send their document records back with
+    their results, and keep the cProfile stats of their slowest documents in `path`.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.cprofile_top = 0
+        self.documents = []
+        self.names = {}
+        self.run = {"stages": {}, "counts": {}}
+        self._record = None
+        self._stack = []
+        self._profiled = []
+
+    def configure(self, path, cprofile_top=0):
+        self.enabled = True
+        self.path = path
+        self.cprofile_top = cprofile_top
+        if not os.path.exists(os.path.join(path, CPROFILE_DIR)):
+            os.makedirs(os.path.join(path, CPROFILE_DIR))
+
+    def _target(self):
+        return self._record if self._record is not None else self.run
+
+    def _add(self, name, seconds, calls):
+        stage = self._target()["stages"].setdefault(name, {"seconds": 0.0, "calls": 0})
+        stage["seconds"] += seconds
+        stage["calls"] += calls
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        now = time.perf_counter()
+        if self._stack:
+            self._add(self._stack[-1][0], now - self._stack[-1][1], 0)
+        self._stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._add(name, now - self._stack.pop()[1], 1)
+            if self._stack:
+                self._stack[-1][1] = now
+
+    def count(self, name, n=1):
+        if self.enabled:
+            counts = self._target()["counts"]
+            counts[name] = counts.get(name, 0) + n
+
+    @contextmanager
+    def document(self, text):
+        """Collects the stages of the document with this text into the yielded record.
+
+        The record also gets the total "seconds" when profiling is off, so callers can use it in
+        place of their own timing.
+        """
+        record = {"id": document_id(text) if self.enabled else None, "seconds": 0.0, "stages": {}, "counts": {}}
+        profile = cProfile.Profile() if self.enabled and self.cprofile_top > 0 else None
+        if self.enabled:
+            self._record = record
+        start_time = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield record
+        finally:
+            if profile is not None:
+                profile.disable()
+            record["seconds"] = time.perf_counter() - start_time
+            self._record = None
+            if profile is not None:
+                self._keep_profile(record, profile)
+
+    def _keep_profile(self, record, profile):
+        # the cProfile stats of this process's slowest documents, report() keeps the overall slowest
+        if len(self._profiled) >= self.cprofile_top and record["seconds"] <= self._profiled[0][0]:
+            return
+        profile.dump_stats(os.path.join(self.path, CPROFILE_DIR, record["id"] + ".prof"))
+        heapq.heappush(self._profiled, (record["seconds"], record["id"]))
+        if len(self._profiled) > self.cprofile_top:
+            _, evicted = heapq.heappop(self._profiled)
+            if evicted != record["id"]:
+                os.remove(os.path.join(self.path, CPROFILE_DIR, evicted + ".prof"))
+
+    def add_document(self, record):
+        if self.enabled:
+            self.documents.append(record)
+
+    def name_documents(self, docs):
+        """Names the documents of the report after the files of (file name, text, ...) tuples."""
+        if self.enabled:
+            self.names.update((document_id(doc[1]), doc[0]) for doc in docs)
+
+    def summary(self):
+        total = sum(record["seconds"] for record in self.documents)
+        stages = {}
+        for record in self.documents:
+            for name, stage in record["stages"].items():
+                summary = stages.setdefault(name, {"seconds": 0.0, "calls": 0, "documents": 0})
+                summary["seconds"] += stage["seconds"]
+                summary["calls"] += stage["calls"]
+                summary["documents"] += 1
+        for summary in stages.values():
+            summary["share"] = summary["seconds"] / total if total else 0.0
+        return {"documents": len(self.documents), "seconds": total, "stages": stages, "run": self.run}
+
+    def report(self):
+        """Writes profile.json and profile.csv to `path` and returns the summary."""
+        if not self.enabled:
+            return None
+        for record in self.documents:
+            record["document"] = self.names.get(record["id"])
+        summary = self.summary()
+        with open(os.path.join(self.path, "profile.json"), "w", encoding="utf8") as f:
+            json.dump({"summary": summary, "documents": self.documents}, f, ensure_ascii=False, indent=2)
+
+        stage_names = sorted(summary["stages"], key=lambda name: -summary["stages"][name]["seconds"])
+        count_names = sorted({name for record in self.documents for name in record["counts"]})
+        with open(os.path.join(self.path, "profile.csv"), "w", encoding="utf8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["document", "id", "seconds"] + stage_names + count_names)
+            for record in self.documents:
+                writer.writerow([record["document"], record["id"], record["seconds"]] +
+                                [record["stages"].get(name, {}).get("seconds", 0.0) for name in stage_names] +
+                                [record["counts"].get(name, 0) for name in count_names])
+
+        if self.cprofile_top > 0:
+            slowest = sorted(self.documents, key=lambda record: -record["seconds"])[:self.cprofile_top]
+            keep = {record["id"] + ".prof" for record in slowest}
+            for profile_file in os.listdir(os.path.join(self.path, CPROFILE_DIR)):
+                if profile_file not in keep:
+                    os.remove(os.path.join(self.path, CPROFILE_DIR, profile_file))
+        return summary
+
+
+profiler = StageProfiler()
@@ -1,33 +1,37 @@
 import os
 import json
+from vector_store import save_vector_store
 
 
-def save_predictions(input_data, prediction_dict, config, name):
+def predictions_dir(config, name):
     folder_name = "-".join([name, config["task"], config["model"]["name"],
                             "-".join(str(v) for v in config["model"]["hyperparams"]),
                             str(config["features"]["selection"]), str(config["features"]["pca"])])
-    save_dir = os.path.join(config["outputDir"], folder_name)
+    return os.path.join(config["outputDir"], folder_name)
+
+
+def save_prediction(save_dir, filename, text, prediction):
+    new_filename = os.path.splitext(filename)[0] + '.truth'
+    json_dict = {"text": text, "result": prediction}
+    if not os.path.exists(save_dir):
+        os.makedirs(save_dir)
+    with open(os.path.join(save_dir, new_filename), "w", encoding="utf8") as f:
+        json.dump(json_dict, f, ensure_ascii=False)
+
+
+def save_predictions(input_data, prediction_dict, config, name):
+    save_dir = predictions_dir(config, name)
     filenames = [filename for filename, _, _ in input_data]
     texts = [text for _, text, _ in input_data]
     predictions = zip(filenames, texts, prediction_dict)
     for filename, text, prediction in predictions:
-        new_filename = os.path.splitext(filename)[0] + '.truth'
-        json_dict = {"text": text, "result": prediction}
-        if not os.path.exists(save_dir):
-            os.makedirs(save_dir)
-        with open(os.path.join(save_dir, new_filename), "w", encoding="utf8") as f:
-            json.dump(json_dict, f, ensure_ascii=False)
+        save_prediction(save_dir, filename, text, prediction)
 
 
-def save_vectors(input_data, vectors, config, folder_name):
-    save_dir = os.path.join(config["vectorsDir"], folder_name)
-    filenames = [filename for filename, _, _ in input_data]
-    texts = [text for _, text, _ in input_data]
-    predictions = zip(filenames, texts, vectors)
-    for filename, text, prediction in predictions:
-        new_filename = os.path.splitext(filename)[0] + '.truth'
-        json_dict = {"text": text, "vector": prediction}
-        if not os.path.exists(save_dir):
-            os.makedirs(save_dir)
-        with open(os.path.join(save_dir, new_filename), "w", encoding="utf8") as f:
-            json.dump(json_dict, f, ensure_ascii=False)
\ No newline at end of file
+def vectors_dir(config, folder_name):
+    return os.path.join(config["vectorsDir"], folder_name)
+
+
+def save_vectors(input_data, vectors, config, folder_name, feature_names=None):
+    filenames = [os.path.splitext(filename)[0] for filename, _, _ in input_data]
+    save_vector_store(vectors_dir(config, folder_name), filenames, vectors, feature_names)
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from models.nath_et_al.src.algorithms.threshold_clustering.cluster_graph import cluster_graph, \
+    cluster_graph_networkx
+
+# the reference engine tests `entry in entries_already_traversed` with an empty array, which numpy 2 rejects
+pytestmark = [
+    pytest.mark.skipif(np.lib.NumpyVersion(np.__version__) >= "2.0.0",
+                       reason="cluster_graph_networkx needs numpy < 2"),
+    pytest.mark.filterwarnings("ignore:elementwise comparison failed:DeprecationWarning"),
+]
+
+
+def random_dist_matrix(rng, n_nodes, decimals=None):
+    dist_matrix = rng.random_sample((n_nodes, n_nodes))
+    if decimals is not None:
+        # few distinct values, so many entries share their distance
+        dist_matrix = np.round(dist_matrix, decimals)
+    dist_matrix = np.tril(dist_matrix, -1)
+    return dist_matrix + dist_matrix.T
+
+
+def clusters_of(cg_list):
+    return [sorted((min(u, v), max(u, v), cg.get_edge_data(u, v)['weight']) for u, v in cg.edges())
+            for cg in cg_list]
+
+
+def assert_same_clusters(dist_matrix, merge_threshold, add_threshold):
+    node_labels = list(range(len(dist_matrix)))
+    expected = cluster_graph_networkx(node_labels, dist_matrix, merge_threshold, add_threshold)
+    actual = cluster_graph(node_labels, dist_matrix, merge_threshold, add_threshold)
+    assert clusters_of(actual) == clusters_of(expected)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_random_distances(seed):
+    rng = np.random.RandomState(seed)
+    dist_matrix = random_dist_matrix(rng, rng.randint(2, 13))
+    for merge_threshold, add_threshold in [(50, 50), (5, 100), (500, 10)]:
+        assert_same_clusters(dist_matrix, merge_threshold, add_threshold)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_tied_distances(seed):
+    rng = np.random.RandomState(1000 + seed)
+    dist_matrix = random_dist_matrix(rng, rng.randint(3, 13), decimals=1)
+    for merge_threshold, add_threshold in [(50, 50), (5, 100), (500, 10)]:
+        assert_same_clusters(dist_matrix, merge_threshold, add_threshold)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_thresholds_equal_to_distances(seed):
+    rng = np.random.RandomState(2000 + seed)
+    dist_matrix = random_dist_matrix(rng, rng.randint(3, 11), decimals=1)
+    distances = dist_matrix[np.tril_indices(len(dist_matrix), -1)]
+    for merge_threshold, add_threshold in rng.choice(distances, (4, 2)):
+        assert_same_clusters(dist_matrix, merge_threshold, add_threshold)
+
+
+def test_zero_distances():
+    # clusters with an average distance of 0 take the fixed 0.3 branches of the criteria
+    rng = np.random.RandomState(3000)
+    dist_matrix = random_dist_matrix(rng, 8, decimals=1)
+    dist_matrix[1, 0] = dist_matrix[0, 1] = 0.0
+    dist_matrix[3, 2] = dist_matrix[2, 3] = 0.0
+    dist_matrix[5, 4] = dist_matrix[4, 5] = 0.3
+    assert_same_clusters(dist_matrix, 50, 50)
+
+
+def test_entries_with_traversed_distance_are_skipped():
+    # the reference engine tests `entry in entries_already_traversed` on a numpy array, which matches column-wise:
+    # once the edges of cluster {0, 1, 2} are traversed, (4, 3) is skipped because its distance 0.2 equals the
+    # traversed distance of (2, 0), although it shares no node with that cluster
+    dist_matrix = np.array([[0.0, 0.1, 0.2, 0.9, 0.9],
+                            [0.1, 0.0, 0.15, 0.9, 0.9],
+                            [0.2, 0.15, 0.0, 0.9, 0.9],
+                            [0.9, 0.9, 0.9, 0.0, 0.2],
+                            [0.9, 0.9, 0.9, 0.2, 0.0]])
+    node_labels = list(range(5))
+    expected = cluster_graph_networkx(node_labels, dist_matrix)
+    actual = cluster_graph(node_labels, dist_matrix)
+    assert clusters_of(actual) == clusters_of(expected)
+    assert sorted(node for cg in actual for node in cg.nodes()) == [0, 1, 2]
@@ -0,0 +1,116 @@
+import random
+
+import pytest
+
+from models.utils.evaluation17 import computeMeasures, getWordPositionsFromCharacterPositions
+
+
+def legacy_word_positions(text, groundTruthCharPositions, producedCharPositions):
+    # the per-character loop getWordPositionsFromCharacterPositions replaced
+    wordCount = 0
+    groundTruthWordPositions = []
+    producedWordPositions = []
+    for i in range(1, len(text) - 1):
+        if text[i] == ' ' and text[i - 1] != ' ':
+            wordCount = wordCount + 1
+        if i in groundTruthCharPositions:
+            groundTruthWordPositions.append(wordCount)
+        if i in producedCharPositions:
+            producedWordPositions.append(wordCount)
+    return (groundTruthWordPositions, producedWordPositions, wordCount + 1)
+
+
+class LegacyMetrics(object):
+    # the string based WinPR counts Metrics replaced
+    def __init__(self, gold_seg, hypo_seg, k, boundary="1"):
+        self.tp = self.tn = self.fp = self.fn = 0.0
+        self.k = k
+        if self.k != 0:
+            for i in range(len(gold_seg) + 1 - self.k):
+                self.update(gold_seg[i:i + k].count(boundary), hypo_seg[i:i + k].count(boundary))
+        else:
+            self.update(gold_seg[0].count(boundary), hypo_seg[0].count(boundary))
+
+    def update(self, goldCount, hypoCount):
+        self.tp += min(goldCount, hypoCount)
+        self.tn += self.k - max(goldCount, hypoCount) if self.k > 0 else 0.0
+        self.fn += max(0, goldCount - hypoCount)
+        self.fp += max(0, hypoCount - goldCount)
+
+    def precision(self):
+        return 0 if self.tp == 0 else self.tp / (self.tp + self.fp)
+
+    def recall(self):
+        return 0 if self.tp == 0 else self.tp / (self.tp + self.fn)
+
+    def accuracy(self):
+        return (self.tp + self.tn) / (self.tp + self.tn + self.fn + self.fp)
+
+    def f1score(self, beta=1.0):
+        if (self.precision() == 0 and self.recall() == 0) or self.precision() < 0 or self.recall() < 0:
+            return 0.0
+        return (1.0 + beta) * (self.precision() * self.recall() / (beta ** 2 * self.precision() + self.recall()))
+
+
+def legacy_measures(inputText, groundTruthData, producedData):
+    (groundTruthWordPositions, producedDataWordPositions, totalWordCount) = legacy_word_positions(
+        inputText, groundTruthData["style_breaches"], producedData["style_breaches"])
+    groundTruthString = ''.join('1' if i in groundTruthWordPositions else '0' for i in range(totalWordCount - 1)) + '1'
+    producedString = ''.join('1' if i in producedDataWordPositions else '0' for i in range(totalWordCount - 1)) + '1'
+    if len(groundTruthWordPositions) == 0:
+        halfSegmentLength = round(totalWordCount / 2)
+    else:
+        halfSegmentLength = round(totalWordCount / (len(groundTruthWordPositions) + 1) / 2)
+    metric = LegacyMetrics(groundTruthString, producedString, halfSegmentLength)
+    return (metric.recall(), metric.precision(), metric.f1score(), metric.accuracy())
+
+
+def outcome(func, *args):
+    # a window of 0 words with no breach in the first one divides by zero in both versions
+    try:
+        return func(*args)
+    except ZeroDivisionError as e:
+        return type(e)
+
+
+def assert_unchanged(text, truth, produced):
+    assert getWordPositionsFromCharacterPositions(text, truth, produced) == legacy_word_positions(text, truth, produced)
+    assert outcome(computeMeasures, text, {"style_breaches": truth}, {"style_breaches": produced}) == \
+        outcome(legacy_measures, text, {"style_breaches": truth}, {"style_breaches": produced})
+
+
+TEXT = "the first paragraph  of words\nand  the second one   ends here"
+EDGE_CASES = [
+    ([0], [len(TEXT) - 1]),  # offsets outside of the scanned range
+    ([len(TEXT) - 2], [len(TEXT) - 2]),  # the last scanned offset
+    ([1], [len(TEXT) - 2, 0]),
+    ([30, 30, 12], [12, 12, 30, 30]),  # repeated offsets
+    ([19, 20, 21], [20]),  # offsets on repeated spaces
+    ([], [30]),
+    ([30], []),
+    ([], []),
+    ([-1, len(TEXT), len(TEXT) + 5], [3]),
+]
+
+
+@pytest.mark.parametrize("truth, produced", EDGE_CASES)
+def test_edge_offsets(truth, produced):
+    assert_unchanged(TEXT, truth, produced)
+
+
+@pytest.mark.parametrize("text", ["  leading spaces here", "trailing spaces here  ", "  both   ends  ",
+                                  "repeated    spaces     between", "   ", " a ", "ab", "a", ""])
+def test_spacing(text):
+    offsets = list(range(-1, len(text) + 1))
+    assert_unchanged(text, offsets, offsets[::2])
+    assert_unchanged(text, [0, max(len(text) - 2, 0)], [max(len(text) - 1, 0)])
+    assert_unchanged(text, [], offsets[1::3])
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_texts(seed):
+    rng = random.Random(seed)
+    text = ''.join(rng.choice("ab  \n") for _ in range(rng.randint(0, 120)))
+    truth = [rng.randint(-2, len(text) + 2) for _ in range(rng.randint(0, 6))]
+    produced = [rng.randint(-2, len(text) + 2) for _ in range(rng.randint(0, 6))] + truth[:rng.randint(0, 2)]
+    assert_unchanged(text, truth, produced)
@@ -0,0 +1,50 @@
+import csv
+import json
+import os
+
+import numpy as np
+
+import eval as evaluation
+from feature_extraction import annotation
+from vector_store import save_vector_store
+
+
+def write_dataset(path, n_docs=4, n_paragraphs=6):
+    os.makedirs(path)
+    for i in range(n_docs):
+        doc = {"paragraphs": ["paragraph {} of document {}".format(j, i) for j in range(n_paragraphs)],
+               "paragraph_source_docs": [int(j >= n_paragraphs // 2) for j in range(n_paragraphs)]}
+        with open(os.path.join(path, "problem-{}.json".format(i)), "w", encoding="utf8") as f:
+            json.dump(doc, f)
+
+
+def test_sweep_with_annotation_store_and_workers(tmp_path):
+    test_dir = str(tmp_path / "dataset")
+    write_dataset(test_dir)
+    config = {
+        "task": "style_change",
+        "model": {"name": "karas", "hyperparams": []},
+        "features": {"extractors": [], "selection": False, "pca": False},
+        "datasets": {"test": [test_dir]},
+        "annotation_store": {"path": str(tmp_path / "annotations"), "version": "test"},
+        "sweep": {"grid": [[0.2, 0.5], [0.5, 1]], "workers": 2},
+        "vectorsDir": str(tmp_path / "vectors"),
+        "resultDir": str(tmp_path / "results"),
+    }
+    # saved vectors for every document, so the sweep extracts nothing
+    rng = np.random.RandomState(0)
+    names = sorted(os.path.splitext(name)[0] for name in os.listdir(test_dir))
+    save_vector_store(os.path.join(config["vectorsDir"], evaluation.vectors_folder_name(config, test_dir)),
+                      names, [rng.random_sample((6, 5)) for _ in names])
+
+    try:
+        evaluation.eval(config)
+        # the store closed by the sweep is no longer registered
+        assert annotation.annotation_store is None
+    finally:
+        annotation.set_annotation_store(None)
+
+    with open(os.path.join(config["resultDir"], "sweep-style_change-karas-False-False.csv"), encoding="utf8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["dataset", "hyperparams", "winP", "winR", "winF", "Acc"]
+    assert [row[1] for row in rows[1:]] == ["0.2-0.5", "0.2-1", "0.5-0.5", "0.5-1"]
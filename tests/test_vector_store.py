@@ -0,0 +1,52 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+from vector_store import VectorStore, VectorStoreWriter, save_vector_store
+
+
+def doc_vectors(name):
+    # a few rows that tell the document they belong to
+    return np.full((len(name) % 3 + 1, 4), sum(map(ord, name)), dtype=np.float32)
+
+
+def save_shard(args):
+    path, names = args
+    writer = VectorStoreWriter(path, ["f"])
+    for name in names:
+        writer.add(name, doc_vectors(name))
+    writer.close()
+
+
+def test_shards_saved_one_after_the_other_are_merged(tmp_path):
+    path = str(tmp_path / "store")
+    save_vector_store(path, ["a", "c"], [doc_vectors("a"), [[0, 0, 0, 0]]], ["f"])
+    save_vector_store(path, ["b", "c"], [doc_vectors("b"), doc_vectors("c")], ["f"])
+    store = VectorStore(path)
+    assert sorted(store.docs) == ["a", "b", "c"]
+    for name in "abc":
+        assert np.array_equal(store.get(name), doc_vectors(name))
+
+
+def test_store_of_other_features_is_replaced(tmp_path):
+    path = str(tmp_path / "store")
+    save_vector_store(path, ["a"], [doc_vectors("a")], ["f"])
+    save_vector_store(path, ["b"], [[[1, 2]]], ["g"])
+    store = VectorStore(path)
+    assert list(store.docs) == ["b"]
+    assert store.get("b").tolist() == [[1, 2]]
+
+
+def test_concurrent_shards_keep_every_document(tmp_path):
+    path = str(tmp_path / "store")
+    shards = [["doc-{}-{}".format(shard, i) for i in range(50)] for shard in range(4)]
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        pool.map(save_shard, [(path, names) for names in shards])
+    store = VectorStore(path)
+    assert sorted(store.docs) == sorted(name for names in shards for name in names)
+    for names in shards:
+        for name in names:
+            assert np.array_equal(store.get(name), doc_vectors(name))
+    # only the index, the lock and the current matrix are left
+    assert len([name for name in os.listdir(path) if name.endswith((".npy", ".rows"))]) == 1
@@ -0,0 +1,122 @@
+import os
+import json
+import fcntl
+import shutil
+import tempfile
+import numpy as np
+
+VECTORS_FILE = "vectors.npy"  # matrix of stores whose index does not name it
+VECTORS_PREFIX = "vectors"
+INDEX_FILE = "index.json"
+LOCK_FILE = "lock"
+ROWS_SUFFIX = ".rows"
+
+
+def is_vector_store(path):
+    return os.path.exists(os.path.join(path, INDEX_FILE))
+
+
+def save_vector_store(path, names, vectors, feature_names=None):
+    """Saves the paragraph vectors of a dataset as one float32 matrix and a JSON index, see VectorStoreWriter."""
+    writer = VectorStoreWriter(path, feature_names)
+    for name, doc_vectors in zip(names, vectors):
+        writer.add(name, doc_vectors)
+    writer.close()
+
+
+class VectorStoreWriter(object):
+    """Writes the paragraph vectors of a dataset one document at a time.
+
+    Rows are appended to a temporary file of this writer as documents arrive. `close` merges them
+    with the store at `path` under a file lock, so the shards of a dataset can be saved at the same
+    time: documents already in the store and not added again keep their rows, a store of other
+    feature groups or another dimension is replaced. The matrix goes to a new file and the JSON
+    index naming it is replaced last, so a crash never leaves an index without its matrix.
+    """
+
+    def __init__(self, path, feature_names=None):
+        self.path = path
+        self.features = list(feature_names) if feature_names is not None else None
+        self.dim = 0
+        self.docs = {}
+        self.rows = 0
+        os.makedirs(path, exist_ok=True)
+        fd, self._rows_path = tempfile.mkstemp(suffix=ROWS_SUFFIX, dir=path)
+        self._rows_file = os.fdopen(fd, "wb")
+
+    def add(self, name, doc_vectors):
+        doc_vectors = np.asarray(doc_vectors, dtype=np.float32)
+        if doc_vectors.size and not self.dim:
+            self.dim = doc_vectors.shape[1]
+        doc_vectors = doc_vectors.reshape(len(doc_vectors), self.dim)
+        self._rows_file.write(doc_vectors.tobytes())
+        self.docs[name] = [self.rows, len(doc_vectors)]
+        self.rows += len(doc_vectors)
+
+    def close(self):
+        self._rows_file.close()
+        with open(os.path.join(self.path, LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._merge()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        os.remove(self._rows_path)
+
+    def _merge(self):
+        existing = VectorStore(self.path) if is_vector_store(self.path) else None
+        kept = []
+        if existing is not None and existing.features == self.features and \
+                (existing.dim == self.dim or not existing.dim or not self.dim):
+            self.dim = self.dim or existing.dim
+            kept = [name for name in existing.docs if name not in self.docs]
+        docs = {}
+        row = 0
+        for name in kept:
+            docs[name] = [row, existing.docs[name][1]]
+            row += existing.docs[name][1]
+        for name, (start, count) in self.docs.items():
+            docs[name] = [row + start, count]
+        rows = row + self.rows
+
+        fd, vectors_path = tempfile.mkstemp(prefix=VECTORS_PREFIX, suffix=".npy", dir=self.path)
+        with os.fdopen(fd, "wb") as f:
+            np.lib.format.write_array_header_1_0(f, {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+                                                     "fortran_order": False, "shape": (rows, self.dim)})
+            for name in kept:
+                f.write(np.ascontiguousarray(existing.get(name)).tobytes())
+            with open(self._rows_path, "rb") as rows_file:
+                shutil.copyfileobj(rows_file, f)
+        vectors_file = os.path.basename(vectors_path)
+        index_path = os.path.join(self.path, INDEX_FILE)
+        with open(index_path + ".tmp", "w", encoding="utf8") as f:
+            json.dump({"dtype": "float32", "dim": self.dim, "rows": rows, "features": self.features,
+                       "vectors": vectors_file, "docs": docs}, f, ensure_ascii=False)
+        existing = None
+        os.replace(index_path + ".tmp", index_path)
+        # matrices of earlier saves, readers that still map one keep it until they close it
+        for name in os.listdir(self.path):
+            if name.startswith(VECTORS_PREFIX) and name.endswith(".npy") and name != vectors_file:
+                os.remove(os.path.join(self.path, name))
+
+
+class VectorStore(object):
+    """Read access to a saved vector store, the matrix is memory-mapped so worker processes share its pages."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, INDEX_FILE), "r", encoding="utf8") as f:
+            index = json.load(f)
+        self.dim = index["dim"]
+        self.features = index["features"]
+        self.docs = index["docs"]
+        self.matrix = np.load(os.path.join(path, index.get("vectors", VECTORS_FILE)), mmap_mode="r")
+
+    def __contains__(self, name):
+        return name in self.docs
+
+    def __len__(self):
+        return len(self.docs)
+
+    def get(self, name):
+        start, count = self.docs[name]
+        return self.matrix[start:start + count]